@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Benchmark of concurrent scans in one event loop by walk_async().
+One of the trees imitates a slow mount (every scandir() is delayed),
+the others are fast. Times of the fast scans alone and next to
+the slow one show whether the slow mount stalls them.
+
+Usage: bench_async.py [scans] [delay_ms]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filelister.aio import CONCURRENCY, walk_async
+
+from osproxy import ProxyOS, patch_os
+from treegen import generate
+
+
+async def timed_scan(root, executor):
+    """Return (seconds, number of entries) of a scan of root."""
+    start = time.perf_counter()
+    count = 0
+    async for _ in walk_async(root, executor=executor):
+        count += 1
+    return time.perf_counter() - start, count
+
+async def run_scans(roots, executor):
+    """Return results of timed_scan() of roots run concurrently."""
+    return await asyncio.gather(*(timed_scan(root, executor)
+                                  for root in roots))
+
+
+def main(argv):
+    """Print times of fast scans without and with a slow one."""
+    scans = int(argv[1]) if len(argv) > 1 else 20
+    delay = float(argv[2]) / 1000 if len(argv) > 2 else 0.05
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = []
+        for i in range(scans + 1):
+            root = os.path.join(tmp, 'volume{}'.format(i))
+            os.mkdir(root)
+            generate(root, files=1000, depth=3, fanout=4, seed=i)
+            roots.append(root)
+        slow, fast = roots[0], roots[1:]
+        executor = ThreadPoolExecutor(max_workers=(scans + 1) * CONCURRENCY)
+        loop = asyncio.new_event_loop()
+        try:
+            with patch_os(ProxyOS(delay, root=slow)):
+                alone = loop.run_until_complete(run_scans(fast, executor))
+                mixed = loop.run_until_complete(run_scans(roots, executor))
+        finally:
+            loop.close()
+            executor.shutdown()
+
+    print('{} fast scans, 1 slow scan with {} ms per directory'.format(
+                                                    scans, delay * 1000))
+    print('fast scans alone:         max {:.3f} s'.format(
+                                            max(t for t, _ in alone)))
+    print('fast scans next to slow:  max {:.3f} s'.format(
+                                            max(t for t, _ in mixed[1:])))
+    print('slow scan:                    {:.3f} s'.format(mixed[0][0]))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Benchmark of memory taken by a scanned tree in bytes per entry.
+A tree is generated in a temporary directory and kept in memory as
+sorted Path objects (how scan_directory() used to list it), as Node
+objects with lists of children (how scan_tree() used to keep it) and
+as TreeStore columns. Memory is measured with tracemalloc.
+File names repeat in every directory, so TreeStore keeps each once.
+
+Usage: bench_memory.py [dirs] [files_per_dir]
+"""
+
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filelister.core import ALL, Matcher, merged_glob, read_dir, scan_tree
+
+from treegen import generate
+
+def sorted_paths(dir_path):
+    """Return sorted Path objects of all entries."""
+    return sorted(merged_glob(dir_path, True, ALL))
+
+def node_tree(dir_path):
+    """Return Node objects of all entries with lists of children."""
+    matcher = Matcher()
+    tree = []
+    pending = [(tree, str(dir_path))]
+    while pending:
+        children, path = pending.pop()
+        for node, subdir in read_dir(path, matcher):
+            children.append((node, []))
+            if subdir:
+                pending.append((children[-1][1], subdir))
+    return tree
+
+def measure(build, dir_path):
+    """Return bytes allocated by the result of build(dir_path)."""
+    tracemalloc.start()
+    result = build(dir_path)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(argv):
+    """Print bytes per entry of each representation of the tree."""
+    dirs = int(argv[1]) if len(argv) > 1 else 100
+    files = int(argv[2]) if len(argv) > 2 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        made_dirs, made_files = generate(tmp, dirs * files, depth=1,
+                                         fanout=dirs, ext_mix={'dat': 1},
+                                         max_size=1, repeat_names=True)
+        # The root itself is not an entry.
+        entries = made_dirs - 1 + made_files
+        print('Entries: {:,}'.format(entries))
+        print('{:<14}{:>16}'.format('tree', 'bytes/entry'))
+        for name, build in (('Path list', sorted_paths),
+                            ('Node objects', node_tree),
+                            ('TreeStore', scan_tree)):
+            size = measure(build, Path(tmp))
+            print('{:<14}{:>16.1f}'.format(name, size / entries))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Benchmark of console start-up time of file-lister.py.
+It runs the script on a small temporary directory several times
+and compares it with the bare interpreter and an import of tkinter,
+which the console mode must not load.
+
+Usage: bench_startup.py [runs]
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+REPO = Path(__file__).resolve().parent.parent
+SCRIPT = str(REPO / 'file-lister.py')
+
+
+def best_time(cmd, runs):
+    """Return the best wall time of running cmd in seconds."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def loaded_modules(dir_path):
+    """Return names of modules imported by a console run.
+    It is run in the repository, where filelister is imported from.
+    """
+    code = ('import runpy, sys; sys.argv = [{!r}, {!r}]; '
+            'runpy.run_path({!r}, run_name="__main__"); '
+            'print(*sys.modules, file=sys.stderr)').format(SCRIPT, dir_path,
+                                                           SCRIPT)
+    result = subprocess.run([sys.executable, '-c', code],
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, cwd=str(REPO),
+                            check=True)
+    return result.stderr.decode().split()
+
+
+def main(argv):
+    """Print best start-up times of the console mode."""
+    runs = int(argv[1]) if len(argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, 'file.txt').write_text('text')
+        cases = [
+            ('python -c pass', [sys.executable, '-c', 'pass']),
+            ('python -c "import tkinter"',
+             [sys.executable, '-c', 'import tkinter']),
+            ('file-lister.py DIR', [sys.executable, SCRIPT, tmp]),
+        ]
+        for name, cmd in cases:
+            print('{:<30}{:>8.1f} ms'.format(name,
+                                             best_time(cmd, runs) * 1000))
+        tk_modules = [m for m in loaded_modules(tmp) if 'tkinter' in m]
+        print('tkinter modules loaded by console run:', tk_modules or 'none')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""Benchmark of scanning speedup by number of worker threads.
+A tree is generated in a temporary directory and every scandir()
+and stat() call is slowed down to imitate a network filesystem.
+
+Usage: bench_workers.py [delay_ms] [workers ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filelister import core
+
+from osproxy import ProxyOS, patch_os
+from treegen import generate
+
+def main(argv):
+    """Print scan time and speedup for each number of workers."""
+    delay = float(argv[1]) / 1000 if len(argv) > 1 else 0.001
+    workers = [int(w) for w in argv[2:]] or [1, 2, 4, 8, 16, 32]
+    with tempfile.TemporaryDirectory() as tmp:
+        # 156 directories of 10 files each.
+        generate(tmp, files=1560, depth=3, fanout=5)
+        print('Delay per call: {} ms'.format(delay * 1000))
+        print('{:>8}{:>10}{:>10}'.format('workers', 'time, s', 'speedup'))
+        base = None
+        for num in workers:
+            with patch_os(ProxyOS(delay, delay)):
+                start = time.perf_counter()
+                core.scan_tree(Path(tmp), workers=num)
+                elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print('{:>8}{:>10.2f}{:>10.1f}'.format(num, elapsed,
+                                                    base / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Benchmark of output throughput in lines per second.
+Lines of TXT and HTML listings of a generated tree are repeated up to
+the given count and written to a temporary file with print() per line
+(the old way) and with the chunked buffered writer.
+
+Usage: bench_writer.py [lines]
+"""
+
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filelister.core import HTM, TXT, scan_directory
+from filelister.output import open_output, write_lines
+
+from treegen import generate
+
+
+def print_lines(lines, file_path):
+    """Write lines with print() as scan_dir_thread() used to do."""
+    with open(str(file_path), 'w', encoding='utf-8') as fhand:
+        for line in lines:
+            print(line, file=fhand)
+
+def buffered_lines(lines, file_path):
+    """Write lines with the chunked buffered writer."""
+    with open_output(file_path) as fhand:
+        write_lines(lines, fhand)
+
+
+def main(argv):
+    """Print lines per second of each writer for TXT and HTML."""
+    count = int(argv[1]) if len(argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = Path(tmp, 'tree')
+        tree.mkdir()
+        generate(str(tree), files=10000, depth=1, fanout=20)
+        out = Path(tmp, 'out')
+        print('{:<8}{:<12}{:>14}'.format('format', 'writer', 'lines/s'))
+        for ext in (TXT, HTM):
+            sample = list(scan_directory(tree, True, True, True, ext=ext))
+            for name, writer in (('print', print_lines),
+                                 ('buffered', buffered_lines)):
+                lines = islice(cycle(sample), count)
+                start = time.perf_counter()
+                writer(lines, out)
+                elapsed = time.perf_counter() - start
+                print('{:<8}{:<12}{:>14,.0f}'.format(ext, name,
+                                                     count / elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,82 @@
+"""Proxy of the os module for benchmarks: scandir() and stat() calls
+of paths under a root are counted and can be slowed down to imitate
+a network filesystem or a slow mount. It replaces os in filelister.core
+while patch_os() is active.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from filelister import core
+
+
+class ProxyEntry:
+    """DirEntry wrapper counting its stat() calls, which take
+    stat_delay seconds.
+    """
+
+    def __init__(self, entry, proxy):
+        self._entry = entry
+        self._proxy = proxy
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def stat(self, **kwargs):
+        self._proxy.call('stat', self._proxy.stat_delay)
+        return self._entry.stat(**kwargs)
+
+
+class ProxyScandir(list):
+    """List of entries usable as scandir() context manager."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ProxyOS:
+    """Proxy of os module which counts scandir() and stat() calls
+    of paths under root (all paths by default) and delays them
+    by scandir_delay and stat_delay seconds.
+    """
+
+    def __init__(self, scandir_delay=0.0, stat_delay=0.0, root=''):
+        self.scandir_delay = scandir_delay
+        self.stat_delay = stat_delay
+        self.root = str(root)
+        self.counts = {'scandir': 0, 'stat': 0}
+
+    def __getattr__(self, name):
+        return getattr(os, name)
+
+    def call(self, name, delay):
+        """Count a call and wait for its delay."""
+        self.counts[name] += 1
+        if delay:
+            time.sleep(delay)
+
+    def scandir(self, path):
+        if not str(path).startswith(self.root):
+            return os.scandir(path)
+        self.call('scandir', self.scandir_delay)
+        with os.scandir(path) as entries:
+            return ProxyScandir(ProxyEntry(e, self) for e in entries)
+
+    def stat(self, path, *args, **kwargs):
+        if str(path).startswith(self.root):
+            self.call('stat', self.stat_delay)
+        return os.stat(path, *args, **kwargs)
+
+
+@contextmanager
+def patch_os(proxy):
+    """Use ProxyOS proxy as os of filelister.core within the block."""
+    core.os = proxy
+    try:
+        yield proxy
+    finally:
+        core.os = os
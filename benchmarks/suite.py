@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""Benchmark suite of the scan and render paths on a synthetic tree.
+Phases are timed separately: walk (scandir and stat of every
+directory), sort (of every listing), store (adding to TreeStore),
+size (summing totals), render of each output format and the whole
+scan_directory() run. For each phase the best wall time of the runs,
+syscall counts (scandir/stat for walks, writes for renders) and the
+peak RSS of the process so far are recorded.
+Results are saved as JSON and can be compared with a baseline.
+
+Usage: suite.py [--files N] [--depth D] [--fanout F] [--runs R]
+                [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from filelister import core
+from filelister.core import (OUTPUT_FORMATS, RECORD_FORMATS, Matcher,
+                             TreeStore, render_records, render_rows,
+                             scan_directory)
+from filelister.output import BUFFER_SIZE, write_lines
+
+from osproxy import ProxyOS, patch_os
+from treegen import generate
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+class CountingSink(io.RawIOBase):
+    """Raw file counting write calls (syscalls of a real file)."""
+
+    def __init__(self):
+        self.writes = 0
+        self.bytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes += 1
+        self.bytes += len(data)
+        return len(data)
+
+
+def peak_rss_kb():
+    """Return peak RSS of the process in KB (None if unknown)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KB on Linux.
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def best_of(runs, func):
+    """Return (best wall time, result of the last run) of func()."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def count_os_calls(func):
+    """Return counts of scandir()/stat() calls made by func()."""
+    with patch_os(ProxyOS()) as counting:
+        func()
+    return counting.counts
+
+def write_to_sink(lines, binary):
+    """Write lines through the buffered writer, return CountingSink."""
+    sink = CountingSink()
+    fhand = io.BufferedWriter(sink, BUFFER_SIZE)
+    if not binary:
+        fhand = io.TextIOWrapper(fhand, encoding='utf-8')
+    write_lines(lines, fhand, end=b'' if binary else '\n')
+    fhand.flush()
+    return sink
+
+def walk(root):
+    """Return listings of all directories under root."""
+    listings = {}
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        listing = listings[path] = core.list_dir(path)
+        pending.extend(os.path.join(path, e[0]) for e in listing
+                       if e[1] and not e[2])
+    return listings
+
+def build_store(root, listings, matcher):
+    """Return TreeStore filled with listings (totals are not summed)."""
+    tree = TreeStore()
+    tree.add_root(Path(root))
+    pending = [(0, root)]
+    while pending:
+        index, path = pending.pop()
+        pending.extend(tree.add_children(index, path, listings[path],
+                                         matcher))
+    return tree
+
+def run_phases(root, runs):
+    """Return dict of results of each phase."""
+    matcher = Matcher()
+    results = {}
+
+    def record(phase, wall, **counts):
+        results[phase] = dict(wall=round(wall, 6), peak_rss_kb=peak_rss_kb(),
+                              **counts)
+
+    wall, listings = best_of(runs, lambda: walk(root))
+    record('walk', wall, syscalls=count_os_calls(lambda: walk(root)))
+
+    key = lambda e: os.path.normcase(e[0])
+    wall, _ = best_of(runs, lambda: [sorted(listing, key=key)
+                                     for listing in listings.values()])
+    record('sort', wall)
+
+    wall, tree = best_of(runs, lambda: build_store(root, listings, matcher))
+    record('store', wall, entries=len(tree))
+
+    wall, _ = best_of(1, tree.finish)
+    record('size', wall)
+
+    for ext in OUTPUT_FORMATS:
+        if ext in RECORD_FORMATS:
+            def render():
+                events = ((node, depth, False)
+                          for node, depth in tree.iter_tree())
+                events = [(tree.node(0), 0, True)] + list(events)
+                return render_records(events, ext, True)
+        else:
+            def render():
+                events = ((node, depth, False)
+                          for node, depth in tree.iter_tree())
+                return render_rows(events, ext == core.HTM, True, True)
+        binary = ext == core.BIN
+        wall, sink = best_of(runs, lambda: write_to_sink(render(), binary))
+        record('render' + ext, wall, syscalls={'write': sink.writes},
+               bytes=sink.bytes)
+
+    def scan():
+        return write_to_sink(scan_directory(Path(root), True, True, True),
+                             False)
+    wall, sink = best_of(runs, scan)
+    calls = count_os_calls(scan)
+    calls['write'] = sink.writes
+    record('scan_directory', wall, syscalls=calls)
+    return results
+
+def compare(results, baseline):
+    """Print wall time of each phase against the baseline."""
+    print('{:<18}{:>12}{:>12}{:>9}'.format('phase', 'baseline, s', 'now, s',
+                                           'ratio'))
+    for phase, data in results['phases'].items():
+        base = baseline['phases'].get(phase)
+        if base is None: continue
+        ratio = data['wall'] / base['wall'] if base['wall'] else float('nan')
+        print('{:<18}{:>12.4f}{:>12.4f}{:>9.2f}'.format(phase, base['wall'],
+                                                        data['wall'], ratio))
+
+
+def main():
+    """Generate the tree, run phases and save or compare results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', help='JSON file to save results to')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs, files = generate(tmp, args.files, args.depth, args.fanout,
+                               seed=args.seed)
+        results = {
+            'params': dict(files=files, dirs=dirs, depth=args.depth,
+                           fanout=args.fanout, seed=args.seed,
+                           runs=args.runs),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'phases': run_phases(tmp, args.runs),
+        }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fhand:
+            json.dump(results, fhand, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fhand:
+            compare(results, json.load(fhand))
+    else:
+        print(json.dumps(results['phases'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
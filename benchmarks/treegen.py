@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Deterministic generator of synthetic directory trees for benchmarks.
+The same arguments and seed always give the same names and sizes.
+Files are sparse (truncated to their size), so big trees are cheap.
+
+Usage: treegen.py DIR [--files N] [--depth D] [--fanout F] [--seed S]
+"""
+
+import argparse
+import os
+import random
+
+
+# Extensions and their weights, '' is a file without extension.
+EXT_MIX = {
+    'txt': 4, 'jpg': 3, 'png': 1, 'py': 2, 'c': 1, 'pdf': 1,
+    'mp3': 1, 'mp4': 1, 'MKV': 1, '': 1,
+}
+
+
+def generate(path, files=10000, depth=4, fanout=5, ext_mix=None, seed=0,
+                                    max_size=1 << 20, repeat_names=False):
+    """Create a tree in existing directory path: subdirectories form
+    depth levels of fanout each and files are spread over all of them
+    with extensions picked by weights of ext_mix.
+    With repeat_names files are numbered in each directory, so the same
+    names repeat in every directory.
+    Return (number of directories, number of files).
+    """
+    rand = random.Random(seed)
+    ext_mix = ext_mix or EXT_MIX
+    exts = list(ext_mix)
+    weights = [ext_mix[ext] for ext in exts]
+
+    dirs = [path]
+    level = [path]
+    for d in range(depth):
+        level = [os.path.join(parent, 'dir{}_{}'.format(d, i))
+                 for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for dir_path in dirs[1:]:
+        os.mkdir(dir_path)
+
+    numbers = dict.fromkeys(dirs, 0)
+    for i in range(files):
+        ext = rand.choices(exts, weights)[0]
+        # Sizes are spread log-uniformly: many small and few big files.
+        size = int(max_size ** rand.random()) - 1
+        dir_path = rand.choice(dirs)
+        if repeat_names:
+            i = numbers[dir_path]
+            numbers[dir_path] += 1
+        name = 'file{:07}{}'.format(i, '.' + ext if ext else '')
+        with open(os.path.join(dir_path, name), 'wb') as f:
+            f.truncate(size)
+    return len(dirs), files
+
+
+def main():
+    """Generate a tree with parameters from command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('dirpath', help='Existing directory to fill')
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    dirs, files = generate(args.dirpath, args.files, args.depth, args.fanout,
+                           seed=args.seed)
+    print('Created {} directories and {} files'.format(dirs, files))
+
+
+if __name__ == '__main__':
+    main()
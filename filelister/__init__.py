@@ -0,0 +1,12 @@
+"""FileLister scans for files and subfolders in a directory and writes
+to file a list of data structured by hierarchy.
+"""
+
+__author__ = "Andrei Ermishin"
+__copyright__ = "Copyright (c) 2019"
+__credits__ = []
+__license__ = "MIT"
+__version__ = "1.2.0"
+__maintainer__ = "Andrei Ermishin"
+__email__ = "andrey.yermishin@gmail.com"
+__status__ = "Production"
@@ -0,0 +1,79 @@
+"""Asyncio API of FileLister for services running many scans in one
+event loop. Directories are read by blocking scandir()/stat() calls
+in an executor, each scan keeps at most concurrency of them in flight,
+so a slow mount occupies only its own share of the executor threads.
+
+Example:
+    async for path, node in walk_async('/mnt/volume', timeout=600):
+        print(path, node.size)
+"""
+
+import asyncio
+import os
+
+from .core import Matcher, read_dir
+
+
+CONCURRENCY = 4
+
+
+async def walk_async(dir_path, subdirs=True, matcher=None, executor=None,
+                                    concurrency=CONCURRENCY, timeout=None):
+    """Yield (path, Node) of the matching entries of dir_path as their
+    directories are read, in no particular order. Sizes of directories
+    are not summed up.
+    Directories are read in executor (the default executor of the loop
+    if it's None) with at most concurrency reads at a time. For many
+    scans sharing one executor, give it scans * concurrency threads.
+    asyncio.TimeoutError is raised if the scan takes more than timeout
+    seconds, time taken by the consumer of entries included.
+    On timeout, cancellation or closing of the iterator reads waiting
+    for a thread are cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    matcher = matcher or Matcher()
+    deadline = None if timeout is None else loop.time() + timeout
+
+    def check_deadline():
+        if deadline is not None and loop.time() >= deadline:
+            raise asyncio.TimeoutError('Scan of {} took more than {} '
+                                       's'.format(dir_path, timeout))
+
+    to_read = [str(dir_path)]
+    pending = {}
+    try:
+        while to_read or pending:
+            while to_read and len(pending) < concurrency:
+                path = to_read.pop()
+                future = loop.run_in_executor(executor, read_dir, path,
+                                              matcher)
+                pending[future] = path
+            check_deadline()
+            wait_time = None if deadline is None else deadline - loop.time()
+            done, _ = await asyncio.wait(pending, timeout=wait_time,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            check_deadline()
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    nodes = future.result()
+                except PermissionError:
+                    # Skip unreadable directories like scan_tree() does.
+                    continue
+                for node, subdir_path in nodes:
+                    if subdirs and subdir_path:
+                        to_read.append(subdir_path)
+                    if node.matched:
+                        check_deadline()
+                        yield os.path.join(path, node.name), node
+    finally:
+        for future in pending:
+            future.cancel()
+
+async def scan_async(dir_path, subdirs=True, matcher=None, executor=None,
+                                    concurrency=CONCURRENCY, timeout=None):
+    """Return list of (path, Node) of the matching entries of dir_path
+    (see walk_async()).
+    """
+    return [entry async for entry in walk_async(dir_path, subdirs, matcher,
+                                        executor, concurrency, timeout)]
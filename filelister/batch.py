@@ -0,0 +1,171 @@
+"""Batch scanning of FileLister: many roots are scanned by a pool of
+processes, each root is written to its own file by a worker. A merged
+listing is put together from these files in the order of the roots,
+followed by totals of the roots and the grand total.
+"""
+
+import os
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+from .core import (ALL, BIN, HTM, HTML_DIR_COLOR, HTML_HEAD, HTML_ROW,
+                   HTML_TABLE, HTML_TABLE_END, HTML_TAIL, RECORD_FORMATS, TXT,
+                   scan_directory, size2str, write_listing)
+from .output import open_output
+
+
+LARGEST = 'largest'
+GIVEN = 'given'
+ORDERS = [LARGEST, GIVEN]
+
+
+def read_roots(file_path):
+    """Return list of roots in file_path (one per line, '-' for stdin),
+    empty lines and lines starting with '#' are skipped.
+    """
+    if file_path == '-':
+        lines = sys.stdin.readlines()
+    else:
+        with open(file_path, encoding='utf-8') as fhand:
+            lines = fhand.readlines()
+    return [line.strip() for line in lines
+            if line.strip() and not line.lstrip().startswith('#')]
+
+def used_bytes(root):
+    """Return bytes used on the filesystem of root as estimate
+    of its size, 0 if it's unknown.
+    """
+    import shutil
+
+    try:
+        return shutil.disk_usage(root).used
+    except OSError:
+        return 0
+
+def schedule(roots, order=LARGEST):
+    """Return roots in order of scanning: the largest filesystems first
+    keep workers busy till the end, roots on the same filesystem are
+    in the given order.
+    """
+    if order == GIVEN:
+        return list(roots)
+    return sorted(roots, key=used_bytes, reverse=True)
+
+def root_file_name(root, ext):
+    """Return name of a file of root made of its absolute path."""
+    name = re.sub(r'[\\/:]+', '_', os.path.abspath(root)).strip('_')
+    return (name or 'root') + ext
+
+def scan_root(root, file_path, options, part=False):
+    """Scan root and write its listing to file_path in a worker process.
+    options are keyword arguments of scan_directory().
+    Return (root, total size, list of error messages).
+    """
+    errors = []
+    result = {}
+
+    def report(title, message):
+        errors.append('{}: {}'.format(root, message))
+
+    def keep_total(progress):
+        if progress.done:
+            result['total'] = progress.total
+
+    if not Path(root).is_dir():
+        report('Error', 'there is no directory with this path')
+        return root, 0, errors
+    lines = scan_directory(Path(root), report=report, progress=keep_total,
+                           part=part, **options)
+    write_listing(lines, options.get('ext', TXT), file_path, part)
+    return root, result.get('total', 0), errors
+
+def totals_rows(results, ext, types=ALL):
+    """Yield TXT or HTML rows of per-root totals and the grand total."""
+    grand = sum(total for _, total, _ in results)
+    name = 'Size of {} files in {} roots'.format(types, len(results))
+    if ext == HTM:
+        yield HTML_TABLE.format('Totals')
+        for root, total, _ in results:
+            yield HTML_ROW.format(name=root, color='', f_size='',
+                                  d_size=size2str(total))
+        yield HTML_ROW.format(name=name, color=HTML_DIR_COLOR, f_size='',
+                              d_size=size2str(grand))
+        yield HTML_TABLE_END
+    else:
+        yield '\nTotals:'
+        for root, total, _ in results:
+            yield '{:{fill}<130}[{}]'.format(root, size2str(total), fill='-')
+        yield '{:{fill}<130}[{}]'.format(name, size2str(grand), fill='-')
+
+def scan_roots(roots, options, file_path=None, per_root=False, jobs=None,
+                                            order=LARGEST, on_done=None):
+    """Scan roots in a pool of jobs processes (the number of CPUs
+    by default) scheduled in order. With per_root each root is written
+    to a file in directory file_path, otherwise one merged listing is
+    written to file_path or stdout with totals after the roots (records
+    of the roots carry their totals instead).
+    on_done(root, total, errors) is called as roots are done.
+    Return list of (root, total, errors) in the order of roots.
+    """
+    # Imported here to keep start-up of runs of one root fast.
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    ext = options.get('ext', TXT)
+    if per_root:
+        os.makedirs(str(file_path), exist_ok=True)
+        out_dir = str(file_path)
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        out_dir = tmp_dir.name
+    files = {root: os.path.join(out_dir, root_file_name(root, ext))
+             for root in roots}
+    done = {}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(scan_root, root, files[root], options,
+                                   not per_root)
+                       for root in schedule(roots, order)]
+            for future in as_completed(futures):
+                root, total, errors = future.result()
+                done[root] = (root, total, errors)
+                if on_done is not None:
+                    on_done(root, total, errors)
+        results = [done[root] for root in roots]
+        if not per_root:
+            write_merged(results, files, ext, file_path,
+                         options.get('types', ALL))
+    finally:
+        if not per_root:
+            tmp_dir.cleanup()
+    return results
+
+def write_merged(results, files, ext, file_path=None, types=ALL):
+    """Write listings of roots in files one after another and totals
+    to file_path or stdout.
+    """
+    import shutil
+
+    with open_output(file_path, binary=True) as fhand:
+        if ext in RECORD_FORMATS:
+            header = RECORD_FORMATS[ext][1]
+            if header is not None:
+                fhand.write(header if ext == BIN else
+                            header.encode('utf-8') + b'\n')
+        elif ext == HTM:
+            str_date = date.today().strftime('%d.%m.%Y')
+            title = 'Listing on {} of {} roots'.format(str_date, len(results))
+            fhand.write(HTML_HEAD.format(title).encode('utf-8'))
+        for root, _, _ in results:
+            if not os.path.exists(files[root]): continue
+            with open(files[root], 'rb') as part:
+                shutil.copyfileobj(part, fhand)
+            if ext == TXT:
+                fhand.write(b'\n')
+        if ext in (TXT, HTM):
+            rows = list(totals_rows(results, ext, types))
+            if ext == HTM:
+                rows.append(HTML_TAIL.lstrip('\n'))
+            fhand.write('\n'.join(rows).encode('utf-8') + b'\n')
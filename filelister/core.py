@@ -0,0 +1,1239 @@
+"""Scanning core of FileLister: it walks a directory tree and renders
+listings. It doesn't depend on tkinter, so the console mode loads
+only this module.
+"""
+
+# For low-level path manipulation on strings: import os.
+# New module offers classes representing filesystem paths.
+import heapq
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from fnmatch import translate
+from stat import S_ISDIR
+
+from datetime import date
+from array import array
+from itertools import chain, islice
+
+from .output import (BIN_MAGIC, CSV_HEADER, FLUSH_INTERVAL, bin_record,
+                     csv_record, jsonl_record, open_output, write_lines)
+
+
+ALL = 'All'
+MOVIES = 'Movies'
+MUSIC = 'Music'
+PHOTO = 'Photo'
+BOOKS = 'Books'
+CODE = 'Code'
+
+TXT = '.txt'
+HTM = '.htm'
+JSONL = '.jsonl'
+CSV = '.csv'
+BIN = '.bin'
+
+# Machine-readable formats: (encoder of entry, header).
+RECORD_FORMATS = {
+    JSONL:  (jsonl_record, None),
+    CSV:    (csv_record, CSV_HEADER),
+    BIN:    (bin_record, BIN_MAGIC),
+}
+OUTPUT_FORMATS = [TXT, HTM] + list(RECORD_FORMATS)
+
+FILE_TYPES = {
+    ALL:    ['*'],
+    MOVIES: ['3GP', 'ASF', 'AVI', 'FLV', 'M4P', 'M4V', 'MKV', 'MOV', 'MPG',
+             'MPEG', 'MP4', 'MTS', 'M2TS', 'QT', 'TS', 'VOB', 'WEBM', 'WMV'],
+    MUSIC:  ['AAC', 'DTS', 'FLAC', 'M4A', 'MKA', 'MP3', 'WAV', 'WMA'],
+    PHOTO:  ['BMP', 'GIF', 'JPG', 'JPEG', 'PNG', 'RAW', 'SVG'],
+    BOOKS:  ['DJVU', 'DOC', 'DOCX', 'EPUB', 'FB2', 'ODT', 'PDF',
+             'RTF', 'TIFF', 'TXT'],
+    CODE:   ['BAT', 'C', 'CC', 'CPP', 'CS', 'GO', 'H', 'HH', 'HPP', 'IPYNB',
+             'JAVA', 'JS', 'M', 'PHP', 'PL', 'PY', 'R', 'RB', 'SWIFT']
+}
+
+HTML_HEAD = '''<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="utf-8">
+        <title>{}</title>
+    </head>
+    <body>'''
+
+HTML_TABLE = '''
+        <table border="1" style="border-collapse:collapse">
+        <caption>
+            <pre>
+{}
+            </pre>
+        </caption>'''
+
+HTML_START = HTML_HEAD + HTML_TABLE
+
+HTML_ROW = '''            <tr{color}>
+                <td><pre>{name}</pre></td>
+                <td><pre>{f_size}</pre></td>
+                <td><pre>{d_size}</pre></td>
+            </tr>'''
+
+HTML_DIR_COLOR = ' style="background-color:lightsteelblue"'
+
+HTML_TABLE_END = '''        </table>'''
+
+HTML_TAIL = '''
+    </body>
+</html>'''
+
+HTML_END = HTML_TABLE_END + HTML_TAIL
+
+def size2str(num, suffix='B'):
+    """Convert size from bytes to human readable string."""
+    for unit in ('', 'K', 'M', 'G', 'T'):
+        if abs(num) < 1024.0:
+            return '{:3.1f} {}{}'.format(num, unit, suffix)
+        num /= 1024.0
+    return '>1000 TB'
+
+def str2size(text):
+    """Convert size like '700', '1.5M' or '2 GB' to bytes."""
+    text = text.strip().upper().rstrip('B').strip()
+    for power, unit in enumerate(('K', 'M', 'G', 'T'), 1):
+        if text.endswith(unit):
+            return int(float(text[:-1]) * 1024 ** power)
+    return int(float(text))
+
+def print_error(title, message):
+    """Report an error of scanning to stderr (default reporter)."""
+    print(message, file=sys.stderr)
+
+def compile_rules(rules):
+    """Compile glob patterns and 're:' prefixed regular expressions
+    into one regex matching entry names (None if no rules given).
+    """
+    if not rules:
+        return None
+    parts = ('.*?(?:{})'.format(rule[3:]) if rule.startswith('re:')
+             else translate(rule) for rule in rules)
+    return re.compile('|'.join('(?:{})'.format(p) for p in parts))
+
+
+class Matcher:
+    """Class checks entry names against a precomputed set of extensions
+    (case-insensitive) and optional include/exclude rules.
+    Include rules apply to files, excluded directories are not walked.
+    """
+
+    def __init__(self, types=ALL, extensions=None, include=(), exclude=()):
+        """Use extensions of types unless extensions are given."""
+        if extensions is None:
+            extensions = FILE_TYPES[types]
+        self.all_types = '*' in extensions
+        self.extensions = frozenset('.' + ext.lstrip('.').lower()
+                                    for ext in extensions)
+        self.include = compile_rules(include)
+        self.exclude = compile_rules(exclude)
+
+    def excluded(self, name):
+        """Return True if the entry must be skipped entirely."""
+        return self.exclude is not None and bool(self.exclude.match(name))
+
+    def match(self, name, is_dir):
+        """Return True if the entry is to be listed and counted."""
+        if is_dir:
+            return self.all_types
+        if not (self.all_types or
+                os.path.splitext(name)[1].lower() in self.extensions):
+            return False
+        return self.include is None or bool(self.include.match(name))
+
+
+def merged_glob(path, subdirs, types, matcher=None):
+    """Yield all files/directories matching the given file types.
+    The tree is walked once whatever the number of extensions is.
+    """
+    matcher = matcher or Matcher(types)
+    pending = [str(path)]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except PermissionError:
+            continue
+        for entry in entries:
+            if matcher.excluded(entry.name): continue
+            is_dir = entry.is_dir()
+            if matcher.match(entry.name, is_dir):
+                yield Path(entry.path)
+            if subdirs and is_dir and not entry.is_symlink():
+                pending.append(entry.path)
+
+
+class ScanProgress:
+    """Class counts directories, entries and their bytes while a tree
+    is walked and passes itself to callback(progress) at most every
+    interval seconds, and once more with done=True at the end.
+    Counting is done per directory, not in the loop over entries.
+    """
+
+    def __init__(self, callback, interval=0.2):
+        """Set callback which is called with this object."""
+        self.callback = callback
+        self.interval = interval
+        self.dirs = 0
+        self.entries = 0
+        self.bytes = 0
+        self.path = ''
+        # Size of matching entries, it is known when done.
+        self.total = 0
+        self.done = False
+        self._next_call = 0.0
+
+    def add_dir(self, path, listing):
+        """Count a directory read and its listing."""
+        self.dirs += 1
+        self.entries += len(listing)
+        self.bytes += sum(entry[3] for entry in listing)
+        self.path = path
+        now = time.monotonic()
+        if now >= self._next_call:
+            self._next_call = now + self.interval
+            self.callback(self)
+
+    def finish(self, total=0):
+        """Report the final counts and total size."""
+        self.total = total
+        self.done = True
+        self.callback(self)
+
+
+def peak_rss():
+    """Return peak RSS of the process in bytes (None on Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KB on the others.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+def current_rss():
+    """Return RSS of the process in bytes (None if it's unknown,
+    it's known on Linux only).
+    """
+    try:
+        with open('/proc/self/statm') as fhand:
+            pages = int(fhand.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class ScanLimits:
+    """Class stops a walk when max_entries are read, time_budget
+    seconds are over or RSS of the process is over max_rss bytes
+    (not on Windows). Where current RSS is unknown, the peak one is
+    checked once it grows over the peak before the walk (the peak of
+    an earlier walk in the process never goes down).
+    Limits are checked before each directory is read,
+    so the last one may take the entries over the limit. Entries deeper
+    than max_depth are not read (children of the walk root are at 1).
+    Call start() before each walk.
+    """
+
+    def __init__(self, max_entries=None, max_depth=None, time_budget=None,
+                                                            max_rss=None):
+        """Set limits, None is no limit."""
+        self.max_entries = max_entries
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.max_rss = max_rss
+        self.start()
+
+    def start(self):
+        """Start counting entries and time."""
+        self.entries = 0
+        self.deadline = None
+        if self.time_budget is not None:
+            self.deadline = time.monotonic() + self.time_budget
+        self.start_peak = 0
+        if self.max_rss is not None and current_rss() is None:
+            self.start_peak = peak_rss() or 0
+        # Message of the limit which stopped the walk.
+        self.reason = None
+        self.depth_cut = False
+
+    def add_dir(self, listing):
+        """Count entries of a directory read."""
+        self.entries += len(listing)
+
+    def exceeded(self):
+        """Return True if the walk must stop."""
+        if self.reason is None:
+            if (self.max_entries is not None and
+                    self.entries >= self.max_entries):
+                self.reason = '{:,} entries read'.format(self.entries)
+            elif (self.deadline is not None and
+                    time.monotonic() >= self.deadline):
+                self.reason = 'time budget of {} s is over'.format(
+                                                        self.time_budget)
+            elif self.max_rss is not None and self.rss_over():
+                self.reason = 'memory over {}'.format(size2str(self.max_rss))
+        return self.reason is not None
+
+    def rss_over(self):
+        """Return True if RSS of the process is over max_rss."""
+        rss = current_rss()
+        if rss is None:
+            rss = peak_rss() or 0
+            if rss <= self.start_peak:
+                return False
+        return rss > self.max_rss
+
+    def deeper(self, depth):
+        """Return True if a directory at depth may be walked."""
+        if self.max_depth is None or depth < self.max_depth:
+            return True
+        self.depth_cut = True
+        return False
+
+    @property
+    def truncated(self):
+        """Return message why a listing is partial, None if it's not."""
+        if self.reason is not None:
+            return 'Listing is truncated: ' + self.reason
+        if self.depth_cut:
+            return 'Listing is truncated at depth {}'.format(self.max_depth)
+        return None
+
+
+# Phases timed by ScanProfile.
+SCAN = 'scan'
+READ = 'read'
+SORT = 'sort'
+SUM = 'sum'
+RENDER = 'render'
+WRITE = 'write'
+PHASES = [SCAN, READ, SORT, SUM, RENDER, WRITE]
+# Counters of ScanProfile.
+DIRS_OPENED = 'dirs_opened'
+STATS = 'stats'
+ENTRIES_EMITTED = 'entries_emitted'
+BYTES_WRITTEN = 'bytes_written'
+COUNTERS = [DIRS_OPENED, STATS, ENTRIES_EMITTED, BYTES_WRITTEN]
+# Number of the slowest directories kept by ScanProfile.
+SLOWEST = 10
+
+
+class ScanProfile:
+    """Class times phases of a run and counts directories opened, stat
+    calls (one per entry read), entries emitted and bytes written, and
+    keeps (seconds, path) of the slowest directories to read.
+    scan is the walk, which takes read (directory reads, their times
+    are summed over threads), sort (matching and sorting entries) and
+    sum (sizes of directories). render is making lines of the listing
+    out of the tree, write is writing them.
+    Functions of a run are wrapped when it starts, so nothing is done
+    per entry, and without a profile nothing at all.
+    """
+
+    def __init__(self, root='', slowest=SLOWEST):
+        """Start timing a run of root."""
+        # Imported here as runs are not profiled by default.
+        import threading
+
+        self.root = root
+        self.timers = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # Heap of the slowest directories.
+        self.slowest = []
+        self.slowest_size = slowest
+        # Time of the whole run, it is known when done.
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add_time(self, phase, seconds):
+        """Add seconds to the timer of phase."""
+        with self._lock:
+            self.timers[phase] += seconds
+
+    def timed(self, phase, func):
+        """Return func which calls are timed as phase."""
+        def timed_func(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(phase, time.perf_counter() - start)
+        return timed_func
+
+    def timed_read(self, read):
+        """Return read(path) which directories are timed and counted."""
+        def timed_read(path):
+            start = time.perf_counter()
+            listing = ()
+            try:
+                listing = read(path)
+                return listing
+            finally:
+                self.add_dir(path, time.perf_counter() - start, len(listing))
+        return timed_read
+
+    def add_dir(self, path, seconds, entries):
+        """Count a directory read in seconds with its entries."""
+        with self._lock:
+            self.timers[READ] += seconds
+            self.counters[DIRS_OPENED] += 1
+            self.counters[STATS] += entries
+            if len(self.slowest) < self.slowest_size:
+                heapq.heappush(self.slowest, (seconds, path))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, path))
+
+    def counted(self, records, skip=0):
+        """Yield records counted as entries emitted except the first
+        skip of them (headers).
+        """
+        records = iter(records)
+        yield from islice(records, skip)
+        for record in records:
+            self.counters[ENTRIES_EMITTED] += 1
+            yield record
+
+    def counted_events(self, events, include_dir):
+        """Yield (node, depth, closing) events counting entries which
+        are listed of them: matching files and directories (if
+        include_dir) once each, not the root nor rows of totals.
+        """
+        for event in events:
+            node, depth, closing = event
+            if (depth and not closing and node.matched and
+                    (include_dir or not node.is_dir)):
+                self.counters[ENTRIES_EMITTED] += 1
+            yield event
+
+    def finish(self, output_seconds):
+        """Take seconds of writing a listing, which is rendered in the
+        time left after the scan and writes, and stop timing the run.
+        """
+        self.timers[RENDER] = max(0.0, output_seconds - self.timers[SCAN] -
+                                  self.timers[WRITE])
+        self.elapsed = time.perf_counter() - self._start
+
+    def slowest_dirs(self):
+        """Return list of (seconds, path), the slowest first."""
+        return sorted(self.slowest, reverse=True)
+
+
+class TimedOutput:
+    """Class passes writes to a file and adds them to ScanProfile."""
+
+    def __init__(self, fhand, profile):
+        self.fhand = fhand
+        self.profile = profile
+
+    def write(self, data):
+        """Write data timed and count its bytes."""
+        start = time.perf_counter()
+        self.fhand.write(data)
+        self.profile.add_time(WRITE, time.perf_counter() - start)
+        if isinstance(data, str):
+            data = data.encode(self.fhand.encoding, self.fhand.errors)
+        self.profile.counters[BYTES_WRITTEN] += len(data)
+
+    def flush(self):
+        """Flush the file timed."""
+        start = time.perf_counter()
+        self.fhand.flush()
+        self.profile.add_time(WRITE, time.perf_counter() - start)
+
+
+class Node:
+    """Entry of a scanned tree with data cached from its stat result."""
+
+    __slots__ = ('name', 'is_dir', 'matched', 'size', 'mtime', 'total')
+
+    def __init__(self, name, is_dir, matched, size=0, mtime=0.0):
+        self.name = name
+        self.is_dir = is_dir
+        self.matched = matched
+        self.size = size
+        self.mtime = mtime
+        # Size of all matching entries inside a directory.
+        self.total = 0
+
+def root_node(dir_path):
+    """Return Node of the directory to scan (it's never matched)."""
+    st = os.stat(str(dir_path))
+    return Node(dir_path.name, True, False, st.st_size, st.st_mtime)
+
+def list_dir(path):
+    """Return list of (name, is_dir, is_link, size, mtime) tuples
+    for the entries of path.
+    """
+    listing = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                # Broken symlink: use the link itself.
+                st = entry.stat(follow_symlinks=False)
+            listing.append((entry.name, S_ISDIR(st.st_mode),
+                            entry.is_symlink(), st.st_size, st.st_mtime))
+    return listing
+
+SKIP = 'skip'
+LIST = 'list'
+FOLLOW = 'follow'
+# Policies of symlinks: not listed, listed but not followed, followed.
+SYMLINK_POLICIES = [SKIP, LIST, FOLLOW]
+
+
+class DirReader:
+    """Class reads directories like list_dir() does with options of
+    the filesystem: directories on other devices are not walked
+    (they are listed as symlinks), symlinks are skipped, listed or
+    followed, hard links of a file are counted once (the others have
+    size 0) and sizes are allocated blocks instead of apparent sizes.
+    A directory is never walked twice (symlink loops, bind mounts).
+    Inodes are known on POSIX only, on Windows the last two checks
+    are not done. Inodes seen are shared by threads of walk_parallel()
+    under a lock. Call start() before each walk.
+    """
+
+    def __init__(self, one_file_system=False, symlinks=LIST,
+                                    hard_links=False, blocks=False):
+        """Set options of reading."""
+        # Imported here as options of the filesystem are rarely used.
+        import threading
+
+        self.one_file_system = one_file_system
+        self.symlinks = symlinks
+        self.hard_links = hard_links
+        self.blocks = blocks
+        self.device = None
+        self.seen_dirs = set()
+        self.seen_files = set()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """Return state without the lock to send to other processes."""
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Take state of another process with a new lock."""
+        import threading
+
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def start(self, dir_path):
+        """Forget inodes seen and take device of the walk root."""
+        st = os.stat(str(dir_path))
+        self.device = st.st_dev
+        self.seen_dirs = {(st.st_dev, st.st_ino)}
+        self.seen_files = set()
+
+    def list_dir(self, path):
+        """Return list of (name, is_dir, is_link, size, mtime) tuples
+        for the entries of path, is_link is True for directories which
+        must not be walked.
+        """
+        listing = []
+        with os.scandir(path) as entries:
+            # Directories are walked rather than symlinks to them.
+            for entry in sorted(entries, key=os.DirEntry.is_symlink):
+                is_link = entry.is_symlink()
+                if is_link and self.symlinks == SKIP: continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    st = entry.stat(follow_symlinks=False)
+                is_dir = S_ISDIR(st.st_mode)
+                size = st.st_size
+                if self.blocks:
+                    size = getattr(st, 'st_blocks', size // 512) * 512
+                if is_dir:
+                    is_link = is_link and self.symlinks != FOLLOW
+                    if self.one_file_system and st.st_dev != self.device:
+                        is_link = True
+                    elif not is_link and st.st_ino:
+                        inode = (st.st_dev, st.st_ino)
+                        with self._lock:
+                            is_link = inode in self.seen_dirs
+                            self.seen_dirs.add(inode)
+                elif self.hard_links and st.st_nlink > 1:
+                    inode = (st.st_dev, st.st_ino)
+                    with self._lock:
+                        if inode in self.seen_files:
+                            size = 0
+                        self.seen_files.add(inode)
+                listing.append((entry.name, is_dir, is_link, size,
+                                st.st_mtime))
+        return listing
+
+def make_nodes(path, listing, matcher):
+    """Return list of (Node, subdir_path) for the listing of path.
+    subdir_path is None for files and symlinks which are not followed.
+    """
+    nodes = []
+    for name, is_dir, is_link, size, mtime in listing:
+        if matcher.excluded(name): continue
+        node = Node(name, is_dir, matcher.match(name, is_dir), size, mtime)
+        descend = is_dir and not is_link
+        nodes.append((node, os.path.join(path, name) if descend else None))
+    return nodes
+
+def read_dir(path, matcher):
+    """Return list of (Node, subdir_path) for the entries of path."""
+    return make_nodes(path, list_dir(path), matcher)
+
+
+class TreeStore:
+    """Class keeps a scanned tree in parallel array columns instead of
+    an object per entry. Names are ids in a pool of unique strings.
+    Children of a directory are sorted when they are added and take
+    consecutive indexes, which are always greater than their parent's.
+    The root directory has index 0.
+    """
+
+    IS_DIR = 1
+    MATCHED = 2
+    IS_LINK = 4
+
+    def __init__(self):
+        """Create an empty store."""
+        self.pool = []
+        self.pool_ids = {}
+        self.name_id = array('I')
+        self.parent = array('I')
+        self.depth = array('H')
+        self.flags = array('B')
+        self.size = array('Q')
+        self.mtime = array('d')
+        # Size of all matching entries inside a directory.
+        self.total = array('Q')
+        self.first_child = array('I')
+        self.child_count = array('I')
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, name, parent, depth, flags, size, mtime):
+        """Append an entry and return its index."""
+        name_id = self.pool_ids.get(name)
+        if name_id is None:
+            name_id = self.pool_ids[name] = len(self.pool)
+            self.pool.append(name)
+        self.name_id.append(name_id)
+        self.parent.append(parent)
+        self.depth.append(depth)
+        self.flags.append(flags)
+        self.size.append(size)
+        self.mtime.append(mtime)
+        self.total.append(0)
+        self.first_child.append(0)
+        self.child_count.append(0)
+        return len(self.parent) - 1
+
+    def add_root(self, dir_path):
+        """Add the directory to scan (it's never matched)."""
+        st = os.stat(str(dir_path))
+        return self.add(dir_path.name, 0, 0, self.IS_DIR, st.st_size,
+                        st.st_mtime)
+
+    def add_children(self, index, path, listing, matcher):
+        """Add sorted entries of listing of directory path at index.
+        Return list of (index, path) of subdirectories to walk.
+        """
+        entries = sorted((e for e in listing if not matcher.excluded(e[0])),
+                         key=lambda e: os.path.normcase(e[0]))
+        self.first_child[index] = len(self.parent)
+        self.child_count[index] = len(entries)
+        depth = self.depth[index] + 1
+        subdirs = []
+        for name, is_dir, is_link, size, mtime in entries:
+            flags = (self.IS_DIR if is_dir else 0) | (
+                self.MATCHED if matcher.match(name, is_dir) else 0) | (
+                self.IS_LINK if is_link else 0)
+            child = self.add(name, index, depth, flags, size, mtime)
+            if is_dir and not is_link:
+                subdirs.append((child, os.path.join(path, name)))
+        return subdirs
+
+    def children(self, index):
+        """Return range of indexes of children of an entry."""
+        first = self.first_child[index]
+        return range(first, first + self.child_count[index])
+
+    def finish(self):
+        """Sum up sizes of directories bottom-up and drop the lookup
+        table of the name pool which is needed only while adding.
+        """
+        parent, flags, size, total = (self.parent, self.flags, self.size,
+                                      self.total)
+        for i in range(len(parent) - 1, 0, -1):
+            own = size[i] if flags[i] & self.MATCHED else 0
+            total[parent[i]] += own + total[i]
+        self.pool_ids = {}
+
+    def node(self, index):
+        """Return Node with data of an entry."""
+        flags = self.flags[index]
+        node = Node(self.pool[self.name_id[index]], bool(flags & self.IS_DIR),
+                    bool(flags & self.MATCHED), self.size[index],
+                    self.mtime[index])
+        node.total = self.total[index]
+        return node
+
+    def iter_tree(self, subdirs=True):
+        """Yield (Node, depth) of the entries in sorted depth-first
+        order, the same order as sorted paths have.
+        """
+        stack = list(reversed(self.children(0)))
+        while stack:
+            index = stack.pop()
+            depth = self.depth[index]
+            yield self.node(index), depth
+            if subdirs:
+                stack.extend(reversed(self.children(index)))
+
+    def iter_dirs(self, root_path):
+        """Yield (index, path) of the directories of the tree."""
+        stack = [(0, root_path)]
+        while stack:
+            index, path = stack.pop()
+            yield index, path
+            stack.extend((child, os.path.join(path,
+                                    self.pool[self.name_id[child]]))
+                         for child in self.children(index)
+                         if self.flags[child] & self.IS_DIR)
+
+    def iter_files(self):
+        """Yield indexes of the matched files of the tree which are
+        not symlinks.
+        """
+        flags = self.flags
+        for index in range(1, len(flags)):
+            if flags[index] & (self.IS_DIR | self.IS_LINK | self.MATCHED) == (
+                    self.MATCHED):
+                yield index
+
+    def path(self, index, root_path):
+        """Return path of an entry joined to root_path."""
+        names = []
+        while index:
+            names.append(self.pool[self.name_id[index]])
+            index = self.parent[index]
+        return os.path.join(root_path, *reversed(names))
+
+
+class ScanIndex:
+    """Class keeps listings of scanned directories in SQLite database.
+    A directory is read again only if its mtime has changed, otherwise
+    its entries are taken from the index. Directories are still stat'ed
+    one by one, but this is much cheaper than a scandir() and a stat()
+    for every file. Files changed in place (not added, removed
+    or renamed) don't update mtime of their directory though.
+    Only directories read again are written back to the index.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS dirs (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL);
+        CREATE TABLE IF NOT EXISTS entries (
+            dir_id INTEGER, name TEXT, is_dir INTEGER, is_link INTEGER,
+            size INTEGER, mtime REAL);
+        CREATE INDEX IF NOT EXISTS entries_dir ON entries (dir_id);'''
+
+    # Changes within this time after a scan may share the same mtime.
+    MTIME_GRANULARITY = 2.0
+
+    def __init__(self, path):
+        """Open or create index database at path."""
+        # Imported here to keep start-up of runs without index fast.
+        import sqlite3
+        import threading
+
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        # Directories under the root: path: (id, mtime).
+        self.cached = {}
+        # Directories read again: path: (mtime, listing, id or None).
+        self.listings = {}
+        self.started = time.time()
+        self.reused = 0
+        # Function reading directories which are modified.
+        self.read = list_dir
+        # Threads of walk_parallel() share the connection.
+        self._lock = threading.Lock()
+
+    def _range(self, root_path):
+        """Return SQL condition and its arguments for dirs under root."""
+        # Paths starting with root + sep are in [root + sep, root + sep+1).
+        prefix = os.path.join(root_path, '')
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return ('path = ? OR (path >= ? AND path < ?)',
+                (root_path, prefix, upper))
+
+    def load(self, root_path):
+        """Load mtimes of directories under root_path, their entries
+        are loaded when they are reused.
+        """
+        root_path = os.path.abspath(root_path)
+        self.started = time.time()
+        where, args = self._range(root_path)
+        rows = self.conn.execute('SELECT path, id, mtime FROM dirs WHERE ' +
+                                 where, args)
+        self.cached = {path: (dir_id, mtime) for path, dir_id, mtime in rows}
+        self.listings = {}
+
+    def list_dir(self, path):
+        """Return listing of path like list_dir() does using
+        the cached one if the directory is not modified.
+        """
+        key = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime
+        dir_id, cached_mtime = self.cached.pop(key, (None, None))
+        if cached_mtime == mtime:
+            with self._lock:
+                listing = self.conn.execute('''
+                    SELECT name, is_dir, is_link, size, mtime FROM entries
+                    WHERE dir_id = ?''', (dir_id,)).fetchall()
+            self.reused += 1
+            return listing
+        listing = self.read(path)
+        self.listings[key] = (mtime, listing, dir_id)
+        return listing
+
+    def save(self):
+        """Write listings of the directories read again and delete
+        the directories under the root which were not walked.
+        """
+        # A directory changed right after its mtime is read again next time.
+        recent = self.started - self.MTIME_GRANULARITY
+        gone = [(dir_id,) for dir_id, _ in self.cached.values()]
+        stale = [(dir_id,) for _, _, dir_id in self.listings.values()
+                 if dir_id is not None]
+        with self.conn:
+            self.conn.executemany('DELETE FROM entries WHERE dir_id = ?',
+                                  gone + stale)
+            self.conn.executemany('DELETE FROM dirs WHERE id = ?', gone)
+            for path, (mtime, listing, dir_id) in self.listings.items():
+                mtime = mtime if mtime < recent else None
+                if dir_id is None:
+                    dir_id = self.conn.execute(
+                        'INSERT INTO dirs (path, mtime) VALUES (?, ?)',
+                        (path, mtime)).lastrowid
+                else:
+                    self.conn.execute('UPDATE dirs SET mtime = ? WHERE id = ?',
+                                      (mtime, dir_id))
+                self.conn.executemany(
+                    'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                    ((dir_id,) + entry for entry in listing))
+        self.cached = {}
+        self.listings = {}
+
+    def close(self):
+        """Close the database."""
+        self.conn.close()
+
+def scan_tree(dir_path, subdirs=True, include_dir=True, matcher=None,
+        workers=1, index=None, progress=None, reader=None, limits=None,
+                                                            profile=None):
+    """Walk dir_path once and return TreeStore of its tree.
+    Sizes of directories are summed up bottom-up from cached stats.
+    With workers > 1 directories are read by a pool of threads,
+    which pays off for network filesystems.
+    Unmodified directories are taken from ScanIndex if it's given
+    and the index is updated with the new tree.
+    Directories read are counted by ScanProgress if it's given.
+    Directories are read by DirReader if it's given, but not with
+    index: cached listings would skip its options and checks.
+    The walk is stopped by ScanLimits if they are given, directories
+    not read yet are listed empty.
+    Phases of the walk are timed by ScanProfile if it's given.
+    """
+    if index is not None and reader is not None:
+        raise ValueError('Index of scans is not used with options of '
+                         'the filesystem')
+    matcher = matcher or Matcher()
+    tree = TreeStore()
+    root = tree.add_root(dir_path)
+    # Sizes of subdirectories are needed even if they are not listed.
+    recurse = subdirs or include_dir
+    read = list_dir
+    if reader is not None:
+        reader.start(dir_path)
+        read = reader.list_dir
+    add_children = tree.add_children
+    finish = tree.finish
+    if profile is not None:
+        # Directories taken from the index are not read, nor timed.
+        read = profile.timed_read(read)
+        add_children = profile.timed(SORT, add_children)
+        finish = profile.timed(SUM, finish)
+    if index is not None:
+        index.load(str(dir_path))
+        index.read = read
+        read = index.list_dir
+    if limits is not None:
+        limits.start()
+    if workers > 1:
+        walk_parallel(tree, root, str(dir_path), read, matcher, recurse,
+                      workers, progress, limits, add_children)
+    else:
+        pending = [(root, str(dir_path))]
+        while pending:
+            if limits is not None and limits.exceeded(): break
+            parent, path = pending.pop()
+            try:
+                listing = read(path)
+            except PermissionError:
+                # Skip unreadable directories like glob() does.
+                continue
+            if progress is not None:
+                progress.add_dir(path, listing)
+            if limits is not None:
+                limits.add_dir(listing)
+            subdirs_to_walk = add_children(parent, path, listing, matcher)
+            if recurse:
+                pending.extend(subdir for subdir in subdirs_to_walk
+                               if limits is None or
+                               limits.deeper(tree.depth[subdir[0]]))
+    finish()
+    if progress is not None:
+        progress.finish(tree.total[0])
+    if index is not None:
+        index.save()
+    return tree
+
+def walk_parallel(tree, root, path, read, matcher, recurse, workers,
+                        progress=None, limits=None, add_children=None):
+    """Read directories with read(path) in a pool of workers threads
+    and add their entries to TreeStore tree by add_children() (its
+    method by default). When ScanLimits stop the walk, directories
+    waiting for a thread are not read.
+    """
+    # Imported here as it is slow to load and single thread is default.
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    add_children = add_children or tree.add_children
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(read, path): (root, path)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parent, path = pending.pop(future)
+                try:
+                    listing = future.result()
+                except PermissionError:
+                    continue
+                if progress is not None:
+                    progress.add_dir(path, listing)
+                if limits is not None:
+                    limits.add_dir(listing)
+                subdirs_to_walk = add_children(parent, path, listing,
+                                               matcher)
+                if limits is not None and limits.exceeded():
+                    for future in list(pending):
+                        if future.cancel():
+                            del pending[future]
+                    continue
+                if recurse:
+                    for child, child_path in subdirs_to_walk:
+                        if limits is not None and not limits.deeper(
+                                                        tree.depth[child]):
+                            continue
+                        future = pool.submit(read, child_path)
+                        pending[future] = (child, child_path)
+
+def name_key(node):
+    """Return key to sort nodes of a directory as their paths are sorted."""
+    return os.path.normcase(node.name)
+
+def walk_sorted(dir_path, subdirs=True, include_dir=True, matcher=None,
+                progress=None, reader=None, limits=None, profile=None):
+    """Yield (node, depth, closing) in sorted depth-first order reading
+    and sorting one directory at a time, so memory depends on the depth
+    and the widest directory only. Directories are yielded again with
+    closing=True when their total is known (at once if they are not
+    walked, e.g. symlinks), the root (depth 0) is last.
+    Directories read are counted by ScanProgress if it's given.
+    Directories are read by DirReader if it's given.
+    The walk is stopped by ScanLimits if they are given, directories
+    not read yet are yielded empty.
+    Reading and sorting of directories are timed by ScanProfile
+    if it's given.
+    """
+    matcher = matcher or Matcher()
+    recurse = subdirs or include_dir
+    read = list_dir
+    if reader is not None:
+        reader.start(dir_path)
+        read = reader.list_dir
+    if limits is not None:
+        limits.start()
+
+    def sort_dir(path, listing):
+        children = make_nodes(path, listing, matcher)
+        children.sort(key=lambda child: name_key(child[0]))
+        return children
+
+    def sorted_dir(node, path):
+        if limits is not None and limits.exceeded():
+            return node, iter(())
+        try:
+            listing = read(path)
+        except PermissionError:
+            listing = []
+        if progress is not None:
+            progress.add_dir(path, listing)
+        if limits is not None:
+            limits.add_dir(listing)
+        return node, iter(sort_dir(path, listing))
+
+    if profile is not None:
+        read = profile.timed_read(read)
+        sort_dir = profile.timed(SORT, sort_dir)
+        sorted_dir = profile.timed(SCAN, sorted_dir)
+
+    root = root_node(dir_path)
+    stack = [sorted_dir(root, str(dir_path))]
+    while stack:
+        node, children = stack[-1]
+        depth = len(stack)
+        for child, child_path in children:
+            if subdirs or depth == 1:
+                yield child, depth, False
+            if child_path and recurse and (limits is None or
+                                           limits.deeper(depth)):
+                stack.append(sorted_dir(child, child_path))
+                break
+            if child.is_dir and (subdirs or depth == 1):
+                # Directories which are not walked are closed at once.
+                yield child, depth, True
+            if child.matched:
+                node.total += child.size
+        else:
+            stack.pop()
+            if stack:
+                parent = stack[-1][0]
+                parent.total += (node.size if node.matched else 0) + node.total
+            if subdirs or depth <= 2:
+                yield node, depth - 1, True
+    if progress is not None:
+        progress.finish(root.total)
+
+def iter_records(events, include_dir=True, stream=False, root=None):
+    """Yield (path, depth, is_dir, size, total, mtime) of entries with
+    path relative to the root, which is '.' at depth 0 (total is None
+    for files). If root is given, paths start with it.
+    In stream mode records of directories follow their contents.
+    """
+    parts = [] if root is None else [root]
+    shift = 0 if root is None else 1
+    for node, depth, closing in events:
+        if depth and not closing:
+            parts[depth-1+shift:] = [node.name]
+        if depth:
+            if not node.matched: continue
+            if node.is_dir and not include_dir: continue
+            if node.is_dir and stream and not closing: continue
+        path = '/'.join(parts[:depth+shift]) or '.'
+        total = node.total if node.is_dir else None
+        yield path, depth, node.is_dir, node.size, total, node.mtime
+
+def render_records(events, ext, include_dir, stream=False, root=None):
+    """Yield header and records of entries in machine-readable format
+    ext (see iter_records()), there is no header if root is given.
+    """
+    encode, header = RECORD_FORMATS[ext]
+    if header is not None and root is None:
+        yield header
+    for record in iter_records(events, include_dir, stream, root):
+        yield encode(*record)
+
+def render_rows(events, is_html, is_indent, include_dir, subdirs=True,
+                                            stream=False, types=ALL):
+    """Yield TXT or HTML rows of entries in tree-like manner
+    (see scan_directory() for stream mode).
+    """
+    prev_depth = 0
+    for node, depth, closing in events:
+        if not depth:
+            # Stream mode: the root is closed with the total size.
+            size = size2str(node.total)
+            if is_html:
+                yield HTML_ROW.format(name='Size of {} files'.format(types),
+                                      color=HTML_DIR_COLOR, f_size='',
+                                      d_size=size)
+            else:
+                yield '\nSize of {} files: {}'.format(types, size)
+            continue
+        if not node.matched: continue
+        indent = ' ' * 5 * (depth-1)
+        name = indent * is_indent + node.name
+        v_ind = '\n' if depth != prev_depth and not node.is_dir else ''
+        dot1 = '-'
+        dot2 = ' '
+        prev_depth = depth
+        if node.is_dir:
+            if not include_dir: continue
+            if stream and subdirs:
+                # Contents are listed between opening and total rows,
+                # walk_sorted() closes every directory it opens.
+                size = size2str(node.total) if closing else '...'
+                if closing:
+                    name += ' (total)'
+                    prev_depth = None
+            elif stream and not closing:
+                continue
+            else:
+                size = size2str(node.total)
+            if is_html:
+                data = HTML_ROW.format(name=name, color=HTML_DIR_COLOR,
+                                                f_size='', d_size=size)
+            else:
+                data = '\n{:{fill}<130}[{}]'.format(name, size, fill=dot1)
+        else:
+            size = size2str(node.size)
+            if is_html:
+                data = HTML_ROW.format(name=name, color='',
+                                                f_size=size, d_size='')
+            else:
+                data = '{:{fill}<120}{}'.format(name, size, fill=dot2)
+        yield v_ind * (not is_html) + data
+
+def scan_directory(dir_path, subdirs, include_dir, is_indent, ext=TXT,
+                types=ALL, report=print_error, matcher=None, stream=False,
+                workers=1, index=None, progress=None, part=False,
+                reader=None, limits=None, profile=None):
+    """Return strings of files and directories in tree-like manner.
+    Recursively yield entries in dir_path if subdirs is True.
+    Records of RECORD_FORMATS (bytes for BIN) are yielded instead
+    if ext is one of them.
+    Entries are selected by matcher, types is used if it's not given.
+    In stream mode output starts at once and sizes of directories
+    follow their contents (the total size is at the end), directories
+    which are not walked (symlinks, other filesystems, cut by depth)
+    get their total row right after the opening one.
+    workers is the number of threads reading directories (not in
+    stream mode, which reads one directory at a time).
+    index is a path to ScanIndex file used to skip unmodified
+    directories (not in stream mode).
+    progress(ScanProgress) is called while walking if it's given.
+    reader is DirReader with options of the filesystem.
+    ScanLimits stop the walk if they are given and the partial listing
+    is marked as truncated: records end with a marker record (see
+    filelister.output), which is reported as well.
+    The scan is timed and entries emitted are counted by ScanProfile
+    if it's given (see write_listing()).
+    A part of a listing of many roots is yielded if part is True:
+    HTML has no document head and paths of records start with
+    the root instead of '.' (there is no header).
+    Errors are passed to report(title, message).
+    """
+    is_html = ext == HTM
+
+    dir_path_str = str(dir_path.resolve())
+    str_date = date.today().strftime('%d.%m.%Y')
+    header = 'Listing on {} for {} files in:\n'.format(str_date, types)
+    stars = '*' * len(dir_path_str) + '\n'
+    try:
+        if matcher is None:
+            matcher = Matcher(types)
+        if progress is not None:
+            progress = ScanProgress(progress)
+        size = 'Size of {} files: {}'
+        if stream:
+            events = walk_sorted(dir_path, subdirs, include_dir, matcher,
+                                 progress, reader, limits, profile)
+            caption = header + stars + dir_path_str + '\n' + stars[:-1]
+        else:
+            scan_index = ScanIndex(index) if index else None
+            scan = scan_tree
+            if profile is not None:
+                scan = profile.timed(SCAN, scan_tree)
+            try:
+                tree = scan(dir_path, subdirs, include_dir, matcher,
+                            workers, scan_index, progress, reader, limits,
+                            profile)
+            finally:
+                if scan_index:
+                    scan_index.close()
+            events = ((node, depth, False)
+                      for node, depth in tree.iter_tree(subdirs))
+            size = size.format(types, size2str(tree.total[0]))
+            if limits is not None and limits.truncated:
+                size += '\n' + limits.truncated
+            caption = header + stars + dir_path_str + '\n' + stars + size
+        if ext in RECORD_FORMATS:
+            if not stream:
+                events = chain([(tree.node(0), 0, True)], events)
+            records = render_records(events, ext, include_dir, stream,
+                                     dir_path_str if part else None)
+            if profile is not None:
+                # The header is not an entry.
+                has_header = RECORD_FORMATS[ext][1] is not None and not part
+                records = profile.counted(records, 1 if has_header else 0)
+            yield from records
+            if limits is not None and limits.truncated:
+                marker = limits.truncated
+                if part:
+                    marker = '{}: {}'.format(dir_path_str, marker)
+                yield RECORD_FORMATS[ext][0](marker, 0, False, 0, None, 0.0)
+                report('Truncated', '{}: {}'.format(dir_path_str,
+                                                    limits.truncated))
+            return
+        if is_html and part:
+            yield HTML_TABLE.format(caption)
+        elif is_html:
+            yield HTML_START.format('Listing in ' + dir_path_str, caption)
+        else:
+            yield caption + '\n\n'
+
+        if profile is not None:
+            # Rows of totals of stream mode are not entries.
+            events = profile.counted_events(events, include_dir)
+        yield from render_rows(events, is_html, is_indent, include_dir,
+                               subdirs, stream, types)
+        if stream and limits is not None and limits.truncated:
+            if is_html:
+                yield HTML_ROW.format(name=limits.truncated, color='',
+                                      f_size='', d_size='')
+            else:
+                yield limits.truncated
+    except MemoryError as m_err:
+        tip = '\n\nTry a folder with less depth or less small files.'
+        report(m_err.__class__.__name__, str(m_err) + tip)
+    except Exception as e:
+        report(e.__class__.__name__, str(e))
+
+def write_listing(lines, ext, file_path=None, part=False, profile=None,
+                                                            stream=False):
+    """Write lines of scan_directory() in format ext to file_path
+    or to stdout. HTML of a part of a listing ends with its table.
+    In stream mode lines are flushed at least every FLUSH_INTERVAL
+    seconds, so output starts at once.
+    Writes are timed by ScanProfile if it's given, which is finished
+    then (lines of scan_directory() must take the same profile).
+    """
+    is_binary = ext == BIN
+    start = time.perf_counter()
+    with open_output(file_path, binary=is_binary) as fhand:
+        if profile is not None:
+            fhand = TimedOutput(fhand, profile)
+        write_lines(lines, fhand, end=b'' if is_binary else '\n',
+                    flush_interval=FLUSH_INTERVAL if stream else None)
+        if ext == HTM:
+            write_lines([HTML_TABLE_END if part else HTML_END], fhand)
+        if profile is not None:
+            fhand.flush()
+    if profile is not None:
+        profile.finish(time.perf_counter() - start)
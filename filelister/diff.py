@@ -0,0 +1,211 @@
+"""Diff of FileLister: two scans are compared by a merge of their
+record streams, which are sorted by path in the same depth-first order
+as listings are written. A scan is a saved listing in one of the record
+formats (not written in stream mode) or a live directory tree.
+Only a window of unmatched entries is kept to detect moved files,
+so memory doesn't grow with the size of the scans.
+"""
+
+import os
+from datetime import date
+from pathlib import Path
+
+from .core import (HTM, HTML_DIR_COLOR, HTML_ROW, HTML_START, TXT, Matcher,
+                   iter_records, print_error, size2str, walk_sorted)
+from .output import read_records
+
+
+ADDED = '+'
+REMOVED = '-'
+RESIZED = '~'
+MOVED = '>'
+
+# Number of added and removed files kept to be matched as moves.
+MOVE_WINDOW = 100000
+
+
+def path_key(path):
+    """Return key of a path in the order of listings."""
+    return tuple(os.path.normcase(part) for part in path.split('/'))
+
+def scan_records(source, matcher=None, reader=None):
+    """Yield records of source: a saved listing file or a directory,
+    which is walked and sorted one directory at a time.
+    """
+    if not os.path.isdir(str(source)):
+        yield from read_records(source)
+        return
+    # Directories are taken when they are opened, in the order of paths.
+    events = (event for event in walk_sorted(Path(source), matcher=matcher,
+                                             reader=reader)
+              if not event[2])
+    yield from iter_records(events)
+
+def sorted_records(records, name):
+    """Yield (key, record) of records except the root ones and check
+    that they are sorted by path.
+    """
+    last = ()
+    for record in records:
+        if not record[1]: continue
+        key = path_key(record[0])
+        if key <= last:
+            raise ValueError('{} is not sorted by path, listings written '
+                             'in stream mode are not compared'.format(name))
+        last = key
+        yield key, record
+
+
+class MoveWindow:
+    """Class pairs removed and added files with the same (size, mtime)
+    as moves. At most size unpaired files are kept, older ones are
+    given up as just removed or added.
+    """
+
+    def __init__(self, size=MOVE_WINDOW):
+        """Create an empty window."""
+        self.size = size
+        self.count = 0
+        # (size, mtime): list of (kind, path).
+        self.waiting = {}
+
+    def add(self, kind, path, size, mtime):
+        """Return list of changes (kind, path, old size, new size,
+        new path) of the file which is removed or added.
+        """
+        key = (size, mtime)
+        other = REMOVED if kind == ADDED else ADDED
+        waiting = self.waiting.get(key)
+        if waiting and waiting[0][0] == other:
+            other_path = waiting.pop(0)[1]
+            self.count -= 1
+            if not waiting:
+                del self.waiting[key]
+            if kind == ADDED:
+                return [(MOVED, other_path, size, size, path)]
+            return [(MOVED, path, size, size, other_path)]
+        self.waiting.setdefault(key, []).append((kind, path))
+        self.count += 1
+        changes = []
+        while self.count > self.size:
+            changes.append(self.drop(next(iter(self.waiting))))
+        return changes
+
+    def drop(self, key):
+        """Give up the oldest file of key and return its change."""
+        waiting = self.waiting[key]
+        kind, path = waiting.pop(0)
+        self.count -= 1
+        if not waiting:
+            del self.waiting[key]
+        size = key[0]
+        return (kind, path, None if kind == ADDED else size,
+                size if kind == ADDED else None, None)
+
+    def flush(self):
+        """Return changes of all unpaired files."""
+        changes = []
+        while self.waiting:
+            changes.append(self.drop(next(iter(self.waiting))))
+        return changes
+
+def diff_records(old, new, window=MOVE_WINDOW):
+    """Yield changes (kind, path, old size, new size, new path) between
+    sorted streams of (key, record) of old and new scans.
+    Files are moved if a removed and an added one have the same size
+    and mtime, changes of such files are yielded when they are paired
+    or given up.
+    """
+    moves = MoveWindow(window)
+    end = (None, None)
+    old_key, old_rec = next(old, end)
+    new_key, new_rec = next(new, end)
+    while old_key is not None or new_key is not None:
+        if new_key is None or (old_key is not None and old_key < new_key):
+            removed, added = old_rec, None
+            old_key, old_rec = next(old, end)
+        elif old_key is None or new_key < old_key:
+            removed, added = None, new_rec
+            new_key, new_rec = next(new, end)
+        else:
+            removed, added = old_rec, new_rec
+            old_key, old_rec = next(old, end)
+            new_key, new_rec = next(new, end)
+            if removed[2] == added[2]:
+                if not added[2] and removed[3] != added[3]:
+                    yield RESIZED, added[0], removed[3], added[3], None
+                continue
+        if removed is not None:
+            if removed[2]:
+                yield REMOVED, removed[0], None, None, None
+            else:
+                yield from moves.add(REMOVED, removed[0], removed[3],
+                                     removed[5])
+        if added is not None:
+            if added[2]:
+                yield ADDED, added[0], None, None, None
+            else:
+                yield from moves.add(ADDED, added[0], added[3], added[5])
+    yield from moves.flush()
+
+def scan_diff(old_source, new_source, ext=TXT, report=print_error,
+                        matcher=None, window=MOVE_WINDOW, reader=None):
+    """Return strings of TXT or HTML report of changes from old_source
+    to new_source (saved listings or directories, see scan_records())
+    and their counts at the end.
+    matcher selects entries of directories walked by reader (DirReader)
+    if it's given.
+    Errors are passed to report(title, message).
+    """
+    is_html = ext == HTM
+
+    str_date = date.today().strftime('%d.%m.%Y')
+    caption = 'Diff on {} of:\n{}\n{}'.format(str_date, old_source,
+                                              new_source)
+    try:
+        matcher = matcher or Matcher()
+        old = sorted_records(scan_records(old_source, matcher, reader),
+                             old_source)
+        new = sorted_records(scan_records(new_source, matcher, reader),
+                             new_source)
+        if is_html:
+            yield HTML_START.format('Diff of ' + str(new_source), caption)
+        else:
+            yield caption + '\n'
+
+        counts = dict.fromkeys((ADDED, REMOVED, RESIZED, MOVED), 0)
+        for kind, path, old_size, new_size, new_path in diff_records(
+                                                        old, new, window):
+            counts[kind] += 1
+            if kind == MOVED:
+                path = '{} -> {}'.format(path, new_path)
+            is_dir = old_size is None and new_size is None
+            if is_dir:
+                size = ''
+            elif kind == RESIZED:
+                size = '{} -> {}'.format(size2str(old_size),
+                                         size2str(new_size))
+                if size2str(old_size) == size2str(new_size):
+                    size = '{} B -> {} B'.format(old_size, new_size)
+            else:
+                size = size2str(new_size if old_size is None else old_size)
+            name = '{} {}'.format(kind, path)
+            if is_html:
+                yield HTML_ROW.format(name=name,
+                            color=HTML_DIR_COLOR if is_dir else '',
+                            f_size=size, d_size='')
+            else:
+                yield '{:{fill}<120}{}'.format(name, size, fill=' ')
+
+        total = '{} added, {} removed, {} resized, {} moved'.format(
+                counts[ADDED], counts[REMOVED], counts[RESIZED], counts[MOVED])
+        if is_html:
+            yield HTML_ROW.format(name=total, color=HTML_DIR_COLOR,
+                                  f_size='', d_size='')
+        else:
+            yield '\n' + total
+    except MemoryError as m_err:
+        tip = '\n\nTry a smaller MOVE_WINDOW.'
+        report(m_err.__class__.__name__, str(m_err) + tip)
+    except Exception as e:
+        report(e.__class__.__name__, str(e))
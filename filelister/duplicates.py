@@ -0,0 +1,193 @@
+"""Duplicate files finder of FileLister.
+Files are grouped by size first (hard links of a file are taken once,
+as they take no extra space), then by a hash of their first and
+last blocks, and only files which are still alike are hashed in full,
+so most files are never read at all. Hashing is done by a pool of
+threads (hashlib releases the GIL while hashing large buffers).
+"""
+
+import hashlib
+import os
+from collections import Counter
+from datetime import date
+
+from .core import (ALL, HTM, HTML_DIR_COLOR, HTML_ROW, HTML_START, TXT,
+                   Matcher, ScanProgress, print_error, scan_tree, size2str)
+
+
+# Size of the first and the last blocks hashed by partial_hash().
+PARTIAL_BLOCK = 1 << 16
+# Size of chunks read by full_hash().
+HASH_CHUNK = 1 << 20
+HASH_WORKERS = 4
+
+
+def partial_hash(path, size):
+    """Return digest of the first and the last PARTIAL_BLOCK bytes of
+    a file, which is the digest of the whole file if it is small.
+    """
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as fhand:
+        digest.update(fhand.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            fhand.seek(max(size - PARTIAL_BLOCK, PARTIAL_BLOCK))
+            digest.update(fhand.read(PARTIAL_BLOCK))
+    return digest.digest()
+
+def full_hash(path, size=None):
+    """Return digest of the whole file read in HASH_CHUNK chunks."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as fhand:
+        for chunk in iter(lambda: fhand.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def unique_inodes(group):
+    """Return group of (path, size) without hard links of files which
+    are already in it (the first path is kept). Files which can't be
+    stat'ed are dropped.
+    """
+    seen = set()
+    unique = []
+    for path, size in sorted(group):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        # Inodes are 0 where they are unknown.
+        inode = (st.st_dev, st.st_ino)
+        if st.st_ino and inode in seen: continue
+        seen.add(inode)
+        unique.append((path, size))
+    return unique
+
+def group_by_hash(groups, hash_func, pool):
+    """Split groups of (path, size) by hash_func(path, size) computed
+    in pool and return the groups of more than one file.
+    Files which can't be read are dropped.
+    """
+    def safe_hash(item):
+        try:
+            return hash_func(*item)
+        except OSError:
+            return None
+
+    items = [item for group in groups for item in group]
+    subgroups = {}
+    for item, digest in zip(items, pool.map(safe_hash, items)):
+        if digest is not None:
+            subgroups.setdefault((item[1], digest), []).append(item)
+    return [group for group in subgroups.values() if len(group) > 1]
+
+def find_duplicates(files, workers=HASH_WORKERS):
+    """Return list of groups of (path, size) of files with the same
+    contents out of an iterable of (path, size). Empty files are not
+    taken into account as they take no space.
+    """
+    # Imported here as it is slow to load.
+    from concurrent.futures import ThreadPoolExecutor
+
+    by_size = {}
+    for path, size in files:
+        if size:
+            by_size.setdefault(size, []).append((path, size))
+    groups = [unique_inodes(group) for group in by_size.values()
+              if len(group) > 1]
+    groups = [group for group in groups if len(group) > 1]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        groups = group_by_hash(groups, partial_hash, pool)
+        # Partial hashes of small files cover their whole contents.
+        small = [g for g in groups if g[0][1] <= 2 * PARTIAL_BLOCK]
+        large = [g for g in groups if g[0][1] > 2 * PARTIAL_BLOCK]
+        groups = small + group_by_hash(large, full_hash, pool)
+    for group in groups:
+        group.sort()
+    groups.sort(key=lambda group: (-group[0][1] * (len(group)-1), group))
+    return groups
+
+def reclaimable(groups):
+    """Return dict of bytes taken by extra copies per directory.
+    The first copy of each group is the one kept.
+    """
+    dirs = {}
+    for group in groups:
+        for path, size in group[1:]:
+            dir_path = os.path.dirname(path)
+            dirs[dir_path] = dirs.get(dir_path, 0) + size
+    return dirs
+
+def scan_duplicates(dir_path, subdirs=True, ext=TXT, types=ALL,
+                report=print_error, matcher=None, workers=1, progress=None,
+                reader=None):
+    """Return strings of TXT or HTML report of duplicate files in
+    dir_path: reclaimable bytes per directory (biggest first) and then
+    groups of duplicates.
+    workers is the number of threads reading directories, files are
+    hashed by max(workers, HASH_WORKERS) threads.
+    reader is DirReader with options of the filesystem.
+    Errors are passed to report(title, message).
+    """
+    is_html = ext == HTM
+
+    dir_path_str = str(dir_path.resolve())
+    str_date = date.today().strftime('%d.%m.%Y')
+    header = 'Duplicates on {} for {} files in:\n'.format(str_date, types)
+    stars = '*' * len(dir_path_str) + '\n'
+    try:
+        if matcher is None:
+            matcher = Matcher(types)
+        if progress is not None:
+            progress = ScanProgress(progress)
+        tree = scan_tree(dir_path, subdirs, False, matcher, workers,
+                         progress=progress, reader=reader)
+        root = str(dir_path)
+        # Paths are built only for files of sizes which occur more
+        # than once, the others can't have duplicates.
+        sizes = Counter(tree.size[index] for index in tree.iter_files())
+        files = ((tree.path(index, root), tree.size[index])
+                 for index in tree.iter_files()
+                 if sizes[tree.size[index]] > 1)
+        groups = find_duplicates(files, max(workers, HASH_WORKERS))
+        dirs = reclaimable(groups)
+        size = 'Reclaimable: {} in {} groups of duplicates'.format(
+                            size2str(sum(dirs.values())), len(groups))
+        caption = header + stars + dir_path_str + '\n' + stars + size
+        if is_html:
+            yield HTML_START.format('Duplicates in ' + dir_path_str, caption)
+        else:
+            yield caption + '\n\n'
+
+        def relative(path):
+            return os.path.relpath(path, root)
+
+        for dir_name, dir_size in sorted(dirs.items(),
+                                         key=lambda d: (-d[1], d[0])):
+            if is_html:
+                yield HTML_ROW.format(name=relative(dir_name),
+                        color=HTML_DIR_COLOR, f_size='',
+                        d_size=size2str(dir_size))
+            else:
+                yield '{:{fill}<130}[{}]'.format(relative(dir_name),
+                                                 size2str(dir_size), fill='-')
+        for group in groups:
+            name = '{} copies'.format(len(group))
+            extra = size2str(group[0][1] * (len(group)-1))
+            if is_html:
+                yield HTML_ROW.format(name=name, color=HTML_DIR_COLOR,
+                                      f_size='', d_size=extra)
+            else:
+                yield '\n{:{fill}<130}[{}]'.format(name, extra, fill='-')
+            for path, file_size in group:
+                if is_html:
+                    yield HTML_ROW.format(name=relative(path), color='',
+                                          f_size=size2str(file_size),
+                                          d_size='')
+                else:
+                    yield '{:{fill}<120}{}'.format(' ' * 5 + relative(path),
+                                                   size2str(file_size),
+                                                   fill=' ')
+    except MemoryError as m_err:
+        tip = '\n\nTry a folder with less depth or less small files.'
+        report(m_err.__class__.__name__, str(m_err) + tip)
+    except Exception as e:
+        report(e.__class__.__name__, str(e))
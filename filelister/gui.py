@@ -0,0 +1,336 @@
+"""GUI of FileLister made with tkinter."""
+
+import tkinter as tk
+# Explicitly import some submodules:
+from tkinter import ttk
+from tkinter import filedialog
+from tkinter import messagebox
+
+from pathlib import Path
+
+from datetime import date
+from threading import Thread
+
+from . import __author__, __copyright__, __version__
+from .core import (ALL, FILE_TYPES, HTM, HTML_END, TXT, scan_directory,
+                   size2str)
+from .output import open_output, write_lines
+
+
+# ICON_GIF = 'images/documents-icon24.png'
+# # This will convert a GIF/PNG to python source code.
+# import base64
+# with open(ICON_GIF, 'rb') as f_icon:
+#     print("icon='''\\\n", base64.encodebytes(f_icon.read()).decode(), "'''")
+ICON24 = '''
+iVBORw0KGgoAAAANSUhEUgAAABgAAAAYCAYAAADgdz34AAAFMUlEQVR42oVWa2xUVRCembv3Ltsu
+xbbbVheE0gIhMSAKUeODxMQEMRilUEUkQY3a0AUSDJjgK1HBYCSCsMXyw58kxAA+kGgNBMH4A0IU
+E0ikCAWqlhar9kH3ce8945xz77ZLETxpes9jZr6Z78zMWYRwuMefXcu5zApQ3mQk2bCQgRiQfJQ1
+yxrMPiLKfwZmZF++SqZK5kp2fTmynA6wSz62Z+/arO2iMf594z6v76+FYFnGCBEotHzKUiX4VQ8r
+JptI7DIaDW1KQypUipTelLkAipYH1PMdxLxuwLLEZ/b9exrw/J4FDyWd7FGFpIh8sSP65Ku/sY68
+O7cAshcoj4wAoPA1ARX2ZI4RBSfXUjV0QFcuNhd3rZ+1ofGBqtc9z2WvtJ5VzYMStcLB+L0ciSW0
+bkDJyCiskWXkclmwbWdYRkjFXN9lrmlfQ20nhzbipuVT0+sWTUz1lsxR7sw3iL2MFlNCMIU6BY//
+MwJ9JWfO/CLRWyR4kEwmFTlxsg4vgb0/XG7BDcvq0+ueHJ/6/a5PhCWbgoivMXpTAG00m80oyQQD
+pmRAJEb+t8tg/4kQINUwI9U9czt72T7u6enRiYI6MUZREg5GscT6K7Z4woQJ4ObzePHiRY7YNlRX
+V6MVjTMefI4O/NgjAE8n082N96UuTd+k0M9QLu+LbpcQzzeIgJXrl1JpSZV4Hch4nqc6Oy+R40Sh
+srJSKCol52gTHDh2QQAWVaZffnx66vyMVqXyWYpmDsPdFd9I5lijALCwVJLO9FXnGmVbQIlEAjzX
+Va7nCsAYOfUVWzGKti2GtlP9ArA4kX5pfl3q57qPOJ/N8Hg+CLNqfkKfdZUVKBKiBYPCNVKO955r
+llWEKyorwHdd7O7uZhSfym8ZhxQt4YrDz9Ch9mwA8PwjdakjiVdV3dgTVOuchmqrU4qrhMCKit2o
+Aq1pcjwIgcCnc95sBcolIUy8zilfItBODLhlqmPoHpp44hU48mumBd9tSKSXL6xPJeuF9OyguBqR
+69Nlqy+WtVFtmU1BmV4RRETsoqlns4FaKkwEub7YWD51fIg+P/RHC77ZmGx5Z3Wy2R3Ky4k0CQp5
+ZyiaczA3vUK6DqHmT1GxDIRwpOUVWaVj4K0POnfgh6n61jVPxJtyHlyrcN080DZ9J1jdVD7iAGzb
+d3Unbl1R27p6QVmTZKfSN0nDXoyOIEyq/wMw59IeIwTpL/sEoGlS66rHDIA2zSZfKCyuAAzN7ghA
+gXvpRXJvFGYaG4hwzuw4ROn9ArDlxdrWVfPjJoKg9IN2fQ2nuuiYYMTDoFUY2OsokjsSWEcoSh8Y
+EIAXJraufHRsU94NAQI71ykM13IRgJa5kbwG2P51/07cuPTWlnULKpo1RWz+wrKlkCJdXsPzkLKA
+PtOQtHBQklxEEQlFQJu/6N2BbzeUb39t4W0rM748TwWiR7yEAhVBFmniUT+SuqyV4W2YRgqrIrhk
+Ry75/T1daVw6d9yqXe/N2TZw+jd5JtE4r19YLGrXqMGkBUlFa9fDelEBdYZZMLURNl55r5jid9TC
+8vXHVqMTtRKnttZ1TJkUj/dfligob9o1m4xC8BWY19+ungPen6dFfShs37q0pa+V3C4rFznbxezr
+bcJ4uY2XBrzBWSvbJ5vuUhXDeQfT0z6d1nulLH81A3bctIsgD3XCa71oHDg/FBZt0SA7yF3fg2yv
+CyXVpdAeL++ft/b8U92Dqg2LRGumVNlL6ipwqvxEQRg9OHT6BkOfKJf5wj989uwVd7csu/X+v4fr
+vDwfoGHwAAAAAElFTkSuQmCC
+'''
+# 4 x 3
+WINDOW_WIDTH = 640
+WINDOW_HEIGHT = 480
+
+DEF_FNAME = 'FileLister'
+LBL_TEXT_MAX = 75
+
+
+def show_error(title, message):
+    """Report an error of scanning in a message box."""
+    messagebox.showerror(title, message)
+
+
+class Window(ttk.Frame):
+    """Class is used to create GUI for scanning files in directory."""
+
+    def __init__(self, master=None):
+        """Construct a Ttk Frame."""
+        # The class instance (=self) will be content=ttk.Frame(root)
+        super().__init__(master)
+        self.master = master    # it's root=tk.TK()
+        self.dir_path = Path.cwd()
+        self.file_path = self.dir_path.joinpath(DEF_FNAME
+                                                + str(date.today()) + TXT)
+        
+        self.create_widgets()
+        self.arrange_widgets()
+        self.set_defaults()
+    
+    def create_widgets(self):
+        """Create widgets within main frame (self)."""
+        # dir_frame
+        self.dir_frame = ttk.Labelframe(self.master, text='Directory to scan')
+        self.choose_dir_btn = ttk.Button(self.dir_frame, text='Open...',
+                                    command=self.open_dir_dlg)
+        self.dir_lbl_text = tk.StringVar()
+        self.dir_lbl = ttk.Label(self.dir_frame,
+                                textvariable=self.dir_lbl_text)
+
+        # file_frame
+        self.file_frame = ttk.Labelframe(self.master, text='File to save')
+        self.save_file_btn = ttk.Button(self.file_frame, text='Save as...',
+                                    command=self.save_file_dlg)
+        self.file_lbl_text = tk.StringVar()
+        self.file_lbl = ttk.Label(self.file_frame,
+                                textvariable=self.file_lbl_text)
+
+        
+        # options_frame
+        self.options_frame = ttk.Labelframe(self.master,
+                                            text='Options to run')
+        self.opt_chk_frame = ttk.Frame(self.options_frame)
+        self.opt_ftype_frame = ttk.Frame(self.options_frame)
+        self.opt_file_frame = ttk.Frame(self.options_frame)
+        self.opt_run_frame = ttk.Frame(self.options_frame)
+        
+        self.scan_subdirs = tk.BooleanVar()
+        self.scan_subf_chk = ttk.Checkbutton(self.opt_chk_frame,
+                                text='Scan subfolders',
+                                variable=self.scan_subdirs, onvalue=True,
+                                command=self.set_indentation)
+        self.include_dir = tk.BooleanVar()
+        self.incl_dirs_chk = ttk.Checkbutton(self.opt_chk_frame,
+                                text='Include directories',
+                                variable=self.include_dir, onvalue=True)
+        self.indent_levels = tk.BooleanVar()
+        self.ind_levels_chk = ttk.Checkbutton(self.opt_chk_frame,
+                                text='Indent levels',
+                                variable=self.indent_levels, onvalue=True)
+        
+        self.sep1 = ttk.Separator(self.options_frame, orient='vertical')
+        self.ftype = tk.StringVar()
+        self.ftype_rbtns = []
+        for typ in FILE_TYPES:
+            rbtn = ttk.Radiobutton(self.opt_ftype_frame, text=typ,
+                                    variable=self.ftype, value=typ,
+                                    command=self.set_ftype_to_scan)
+            self.ftype_rbtns.append(rbtn)
+        
+        self.sep2 = ttk.Separator(self.options_frame, orient='vertical')
+        self.to_file_lbl = ttk.Label(self.opt_file_frame, text='Output:')
+        self.to_file = tk.StringVar()
+        self.txt_rbtn = ttk.Radiobutton(self.opt_file_frame, text=TXT,
+                                        variable=self.to_file, value=TXT,
+                                        command=self.set_ext)
+        self.htm_rbtn = ttk.Radiobutton(self.opt_file_frame, text=HTM,
+                                        variable=self.to_file, value=HTM,
+                                        command=self.set_ext)
+        
+        self.sep3 = ttk.Separator(self.options_frame, orient='vertical')
+        self.run_btn = ttk.Button(self.opt_run_frame, text='Run',
+                                    command=self.run_scan_dir)
+        self.progressbar = ttk.Progressbar(self.opt_run_frame,
+                                            orient='horizontal',
+                                            length=WINDOW_WIDTH//5,
+                                            mode='determinate')
+        self.progress_lbl_text = tk.StringVar()
+        self.progress_lbl = ttk.Label(self.opt_run_frame,
+                                textvariable=self.progress_lbl_text)
+        self.complete_txt = ttk.Label(self.opt_run_frame, text='Complete!')
+        
+        
+        # bottom_frame
+        self.bottom_frame = ttk.Frame(self.master)
+        self.about_btn = ttk.Button(self.bottom_frame, text='About',
+                                    command=self.about_dlg)
+        self.quit_btn = ttk.Button(self.bottom_frame, text='Exit',
+                                    command=self.master.destroy)
+
+    def arrange_widgets(self):
+        """Organaze and show widgets."""
+        
+        btn_x = 20
+        btn_y = 10
+
+        self.dir_frame.pack(fill='x', padx=btn_x, pady=btn_y)
+        self.choose_dir_btn.pack(side='left', padx=10, pady=2*btn_y)
+        self.dir_lbl.pack(side='right', padx=10, pady=2*btn_y)
+
+        self.file_frame.pack(fill='x', padx=btn_x, pady=btn_y)
+        self.save_file_btn.pack(side='left', padx=10, pady=2*btn_y)
+        self.file_lbl.pack(side='right', padx=10, pady=2*btn_y)
+
+        
+        self.options_frame.pack(fill='x', padx=btn_x, pady=2*btn_y)
+        
+        self.opt_chk_frame.pack(side='left')
+        self.scan_subf_chk.pack(padx=btn_x, pady=btn_y, anchor='w')
+        self.incl_dirs_chk.pack(padx=btn_x, pady=btn_y, anchor='w')
+        self.ind_levels_chk.pack(padx=btn_x, pady=btn_y, anchor='w')
+
+        self.sep1.pack(side='left', fill='y')
+        self.opt_ftype_frame.pack(side='left')
+        self.ftype_rbtns[0].pack(padx=btn_x+10, pady=(btn_y, 0), anchor='w')
+        for rbtn in self.ftype_rbtns[1:-1]:
+            rbtn.pack(padx=btn_x+10, anchor='w')
+        self.ftype_rbtns[-1].pack(padx=btn_x+10, pady=(0, btn_y), anchor='w')
+        
+        self.sep2.pack(side='left', fill='y')
+        self.opt_file_frame.pack(side='left')
+        self.to_file_lbl.pack(padx=btn_x+10, pady=btn_y)
+        self.txt_rbtn.pack(padx=btn_x+10, pady=btn_y, anchor='w')
+        self.htm_rbtn.pack(padx=btn_x+10, pady=btn_y, anchor='w')
+
+        self.sep3.pack(side='left', fill='y')
+        self.opt_run_frame.pack(side='left')
+        self.run_btn.pack(padx=4*btn_x, pady=(btn_y, 0))
+        self.progressbar.pack()
+        self.progress_lbl.pack()
+
+        
+        self.bottom_frame.pack(side='bottom', fill='x',
+                                padx=btn_x, pady=btn_y)
+        self.about_btn.pack(side='left', padx=btn_x, pady=btn_y)
+        self.quit_btn.pack(side='right', padx=btn_x, pady=btn_y)
+    
+    def cut_lbl_text(self, text):
+        """Cut the left side of text to make the right side visible."""
+        if len(text) > LBL_TEXT_MAX:
+            text = '... ' + text[-LBL_TEXT_MAX :]
+        return text
+    
+    def set_defaults(self):
+        """Set default values for widgets."""
+        self.file_lbl_text.set(self.cut_lbl_text(str(self.file_path)))
+        self.dir_lbl_text.set(self.cut_lbl_text(str(self.dir_path)))
+
+        self.scan_subdirs.set(True)
+        self.include_dir.set(True)
+        self.indent_levels.set(True)
+        self.ftype.set(ALL)
+        self.to_file.set(TXT)
+    
+    def set_ftype_to_scan(self):
+        """Set a pattern for scanning. When ftype is not All
+        include_dir will be disabled as directories have no extensions.
+        """
+        is_all_types = self.ftype.get() == ALL
+        self.include_dir.set(is_all_types)
+        incl_dirs_state = 'normal' if is_all_types else 'disabled'
+        self.incl_dirs_chk.config(state=incl_dirs_state)
+    
+    def set_ext(self):
+        """Update extension of file_path and its label."""
+        self.file_path = self.file_path.with_suffix(self.to_file.get())
+        self.file_lbl_text.set(str(self.file_path))
+    
+    def set_indentation(self):
+        """Enable or disable indentation basing on subdirs var."""
+        ind_levels_state = 'normal' if self.scan_subdirs.get() else 'disabled'
+        self.ind_levels_chk.config(state=ind_levels_state)
+    
+    def open_dir_dlg(self):
+        """Open dialog window for choosing a directory to scan."""
+
+        dir_name = filedialog.askdirectory(initialdir=str(self.dir_path))
+        if dir_name:
+            self.dir_path = Path(dir_name)
+            self.dir_lbl_text.set(self.cut_lbl_text(dir_name))
+
+    def save_file_dlg(self):
+        """Open dialog window to choose a path for saving."""
+
+        fname = filedialog.asksaveasfilename(defaultextension=TXT,
+                            filetypes=[('Text File', TXT), ('Web Page', HTM)],
+                            initialdir=self.file_path.parent,
+                            initialfile=self.file_path.stem)
+        if fname:
+            self.file_path = Path(fname)
+            ext = self.file_path.suffix
+            if ext in [TXT, HTM]:
+                self.file_lbl_text.set(self.cut_lbl_text(fname))
+                self.to_file.set(ext)
+            else:
+                self.file_path = self.file_path.with_suffix(TXT)
+                self.file_lbl_text.set(self.cut_lbl_text(str(self.file_path)))
+                self.to_file.set(TXT)
+    
+    def run_scan_dir(self):
+        """Start new thread for showing animation of progressbar."""
+        self.run_btn.state(['disabled'])
+        if self.complete_txt.winfo_manager():
+            self.complete_txt.pack_forget()
+        Thread(target=self.scan_dir_thread, daemon=True).start()
+    
+    def scan_dir_thread(self):
+        """Write scanning results of selected directory to a file."""
+        # Number of items is unknown until the tree is walked.
+        self.progress_lbl_text.set('')
+        self.progressbar.config(mode='indeterminate')
+        self.progressbar.start()
+        with open_output(self.file_path) as fhand:
+            found_items = scan_directory(self.dir_path,
+                                        self.scan_subdirs.get(),
+                                        self.include_dir.get(),
+                                        self.indent_levels.get(),
+                                        ext=self.to_file.get(),
+                                        types=self.ftype.get(),
+                                        report=show_error,
+                                        progress=self.show_progress)
+            write_lines(found_items, fhand, on_chunk=self.progressbar.step)
+            if self.to_file.get() == HTM:
+                write_lines([HTML_END], fhand)
+        
+        self.run_btn.state(['!disabled'])
+        self.progressbar.stop()
+        self.progressbar["value"] = self.progressbar["maximum"]
+        self.complete_txt.pack()
+
+    def show_progress(self, progress):
+        """Show counts of ScanProgress, when the walk is done switch
+        progressbar to steps of writing the items.
+        """
+        self.progress_lbl_text.set('{:,} items, {}'.format(progress.entries,
+                                                size2str(progress.bytes)))
+        if progress.done:
+            self.progressbar.stop()
+            self.progressbar.config(mode='determinate', value=0,
+                                    maximum=max(progress.entries, 1))
+
+    def about_dlg(self):
+        """Open window with info about the application."""
+        git_url = 'https://github.com/keen2/file-lister'
+        msg = '{}\nversion: {}\n{}\n\n{} by {}'.format(DEF_FNAME,
+                        __version__, git_url, __copyright__, __author__)
+        messagebox.showinfo('About ' + DEF_FNAME, msg)
+
+
+def run_gui():
+    """Create main window of the application and run the main loop."""
+    root = tk.Tk()
+    # Pass a toplevel widget as main window of the application.
+    app = Window(root)
+    app.master.title('FileLister ' + __version__[:-2])
+    # Set the icon (must keep a reference from destroying by GC).
+    img = tk.PhotoImage(data=ICON24)
+    app.master.tk.call('wm', 'iconphoto', app.master._w, img)
+    # Center the window to be right under an appearing messagebox.
+    window_x = int(root.winfo_screenwidth()/2 - WINDOW_WIDTH/2)
+    window_y = int(root.winfo_screenheight()*2/5 - WINDOW_HEIGHT/2)
+    app.master.geometry('{}x{}+{}+{}'.format(WINDOW_WIDTH, WINDOW_HEIGHT,
+                                             window_x, window_y))
+    app.master.resizable(False, False)
+    # Run the main loop of Tcl.
+    app.master.mainloop()
@@ -0,0 +1,229 @@
+"""Output stage of FileLister: listings are written in large chunks
+through a buffered writer to a file, a pipe or stdout.
+Records of machine-readable formats and profiles of runs are encoded
+here as well.
+
+Binary format: BIN_MAGIC, then records of a little-endian uint32
+length of the rest of the record, BIN_RECORD fields (depth, is_dir,
+size, total, mtime) and UTF-8 relative path.
+
+A listing stopped by limits of scanning ends with a marker record:
+depth 0, not a directory, size 0, mtime 0 and the reason as its path
+(readers which skip root records at depth 0 skip it as well).
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+from itertools import islice
+
+
+BUFFER_SIZE = 1 << 20
+CHUNK_LINES = 4096
+# Streamed lines are written at least this often (seconds).
+FLUSH_INTERVAL = 0.1
+
+CSV_HEADER = 'path,depth,is_dir,size,total,mtime'
+
+BIN_MAGIC = b'FLST\x01'
+BIN_LENGTH = struct.Struct('<I')
+BIN_RECORD = struct.Struct('<HBQQd')
+
+# Prefix of metrics of profiles in Prometheus text format.
+METRICS_PREFIX = 'filelister_'
+PROMETHEUS_SUFFIX = '.prom'
+
+
+def open_output(file_path=None, encoding=None, binary=False):
+    """Open file_path (a file or a named pipe) for buffered writing,
+    stdout if it's None or '-'. Files are encoded in UTF-8 by default.
+    Undecodable bytes of file names are written as they are (like
+    binary records have them).
+    Closing the result of stdout doesn't close stdout itself.
+    """
+    if binary:
+        mode, encoding, errors = 'wb', None, None
+    else:
+        mode, errors = 'w', 'surrogateescape'
+    if file_path is None or str(file_path) == '-':
+        sys.stdout.flush()
+        if not binary:
+            encoding = encoding or sys.stdout.encoding
+        return open(sys.stdout.fileno(), mode, encoding=encoding,
+                    errors=errors, buffering=BUFFER_SIZE, closefd=False)
+    if not binary:
+        encoding = encoding or 'utf-8'
+    # open() for Python 3.4, 3.5:
+    return open(str(file_path), mode, encoding=encoding, errors=errors,
+                buffering=BUFFER_SIZE)
+
+def timed_chunk(lines, chunk_lines, seconds):
+    """Return list of at most chunk_lines lines taken from iterator
+    lines, it ends with the first line after seconds are over.
+    """
+    chunk = []
+    deadline = time.monotonic() + seconds
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_lines or time.monotonic() >= deadline:
+            break
+    return chunk
+
+def write_lines(lines, fhand, chunk_lines=CHUNK_LINES, on_chunk=None,
+                                            end='\n', flush_interval=None):
+    """Write lines with end after each to fhand chunk by chunk, so
+    neither the whole listing is kept in memory nor a call is made
+    per line. Binary records are written with end=b''.
+    If flush_interval is given, lines which come slowly are written
+    and flushed at least every flush_interval seconds.
+    on_chunk(number_of_lines) is called after each chunk.
+    Return the number of lines written.
+    """
+    lines = iter(lines)
+    count = 0
+    while True:
+        if flush_interval is None:
+            chunk = list(islice(lines, chunk_lines))
+        else:
+            chunk = timed_chunk(lines, chunk_lines, flush_interval)
+        if not chunk:
+            return count
+        chunk.append(end[:0])
+        fhand.write(end.join(chunk))
+        if flush_interval is not None:
+            fhand.flush()
+        count += len(chunk) - 1
+        if on_chunk is not None:
+            on_chunk(len(chunk) - 1)
+
+def jsonl_record(path, depth, is_dir, size, total, mtime):
+    """Return JSON Lines record of an entry (total is None for files)."""
+    return json.dumps({'path': path, 'depth': depth, 'is_dir': is_dir,
+                       'size': size, 'total': total, 'mtime': mtime},
+                      separators=(',', ':'))
+
+def csv_record(path, depth, is_dir, size, total, mtime):
+    """Return CSV row of an entry, total is empty for files."""
+    return '"{}",{},{:d},{},{},{!r}'.format(path.replace('"', '""'), depth,
+                        is_dir, size, '' if total is None else total, mtime)
+
+def bin_record(path, depth, is_dir, size, total, mtime):
+    """Return length-prefixed binary record of an entry."""
+    body = BIN_RECORD.pack(depth, is_dir, size, total or 0, mtime)
+    body += os.fsencode(path)
+    return BIN_LENGTH.pack(len(body)) + body
+
+def read_bin_records(fhand):
+    """Yield (path, depth, is_dir, size, total, mtime) records of binary
+    listing file opened in 'rb' mode.
+    """
+    if fhand.read(len(BIN_MAGIC)) != BIN_MAGIC:
+        raise ValueError('Not a binary listing of FileLister')
+    while True:
+        prefix = fhand.read(BIN_LENGTH.size)
+        if not prefix:
+            return
+        body = fhand.read(BIN_LENGTH.unpack(prefix)[0])
+        depth, is_dir, size, total, mtime = BIN_RECORD.unpack_from(body)
+        path = os.fsdecode(body[BIN_RECORD.size:])
+        yield path, depth, bool(is_dir), size, total if is_dir else None, mtime
+
+def read_jsonl_records(fhand):
+    """Yield (path, depth, is_dir, size, total, mtime) records of JSON
+    Lines listing file opened in text mode.
+    """
+    for line in fhand:
+        if not line.strip(): continue
+        rec = json.loads(line)
+        yield (rec['path'], rec['depth'], rec['is_dir'], rec['size'],
+               rec['total'], rec['mtime'])
+
+def read_csv_records(fhand):
+    """Yield (path, depth, is_dir, size, total, mtime) records of CSV
+    listing file opened in text mode with newline=''.
+    """
+    # Imported here as only reading of CSV listings needs it.
+    import csv
+
+    rows = csv.reader(fhand)
+    if next(rows, None) != CSV_HEADER.split(','):
+        raise ValueError('Not a CSV listing of FileLister')
+    for path, depth, is_dir, size, total, mtime in rows:
+        yield (path, int(depth), is_dir == '1', int(size),
+               int(total) if total else None, float(mtime))
+
+def read_records(file_path):
+    """Yield records of a listing file in any of the record formats,
+    which is told by its start (binary) or extension (CSV).
+    """
+    with open(str(file_path), 'rb') as fhand:
+        if fhand.read(len(BIN_MAGIC)) == BIN_MAGIC:
+            fhand.seek(0)
+            yield from read_bin_records(fhand)
+            return
+    is_csv = str(file_path).lower().endswith('.csv')
+    with open(str(file_path), encoding='utf-8', errors='surrogateescape',
+              newline='') as fhand:
+        yield from (read_csv_records if is_csv else read_jsonl_records)(fhand)
+
+def profile_json(profile):
+    """Return JSON of ScanProfile: seconds of the run and its phases,
+    counters and the slowest directories.
+    """
+    slowest = [{'path': path, 'seconds': seconds}
+               for seconds, path in profile.slowest_dirs()]
+    return json.dumps({'root': profile.root, 'seconds': profile.elapsed,
+                       'phases': profile.timers,
+                       'counters': profile.counters, 'slowest': slowest},
+                      indent=1)
+
+def prometheus_label(value):
+    """Return value escaped for a label of Prometheus text format."""
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+def profile_prometheus(profile):
+    """Return ScanProfile in Prometheus text format, metrics have
+    a root label.
+    """
+    root = 'root="{}"'.format(prometheus_label(profile.root))
+    name = METRICS_PREFIX + 'run_seconds'
+    lines = ['# HELP {} Time of the run.'.format(name),
+             '# TYPE {} gauge'.format(name),
+             '{}{{{}}} {!r}'.format(name, root, profile.elapsed)]
+    name = METRICS_PREFIX + 'phase_seconds'
+    lines += ['# HELP {} Time of phases of the run.'.format(name),
+              '# TYPE {} gauge'.format(name)]
+    for phase, seconds in profile.timers.items():
+        lines.append('{}{{{},phase="{}"}} {!r}'.format(name, root, phase,
+                                                       seconds))
+    for counter, count in profile.counters.items():
+        name = '{}{}_total'.format(METRICS_PREFIX, counter)
+        lines += ['# HELP {} Number of {} in the run.'.format(name,
+                                                counter.replace('_', ' ')),
+                  '# TYPE {} counter'.format(name),
+                  '{}{{{}}} {}'.format(name, root, count)]
+    name = METRICS_PREFIX + 'slow_dir_seconds'
+    lines += ['# HELP {} Time of reading the slowest directories.'.format(
+                                                                    name),
+              '# TYPE {} gauge'.format(name)]
+    for seconds, path in profile.slowest_dirs():
+        lines.append('{}{{{},path="{}"}} {!r}'.format(name, root,
+                                        prometheus_label(path), seconds))
+    return '\n'.join(lines) + '\n'
+
+def write_profile(profile, file_path):
+    """Write ScanProfile to file_path ('-' for stderr) in Prometheus
+    text format if its extension is PROMETHEUS_SUFFIX, as JSON otherwise.
+    """
+    if str(file_path).lower().endswith(PROMETHEUS_SUFFIX):
+        text = profile_prometheus(profile)
+    else:
+        text = profile_json(profile) + '\n'
+    if str(file_path) == '-':
+        sys.stderr.write(text)
+        return
+    with open(str(file_path), 'w', encoding='utf-8') as fhand:
+        fhand.write(text)
@@ -0,0 +1,156 @@
+"""Paginated HTML of FileLister for huge listings: rows are written to
+pages of a fixed number of rows one page at a time, and a small index
+page links to the pages and to directories of the top levels with
+their totals. Markup is compact: no <pre> in cells, optional end tags
+are left out and the style is set once per page.
+"""
+
+import os
+from datetime import date
+from html import escape
+
+from .core import (ALL, Matcher, ScanIndex, ScanProgress, print_error,
+                   scan_tree, size2str)
+from .output import open_output, write_lines
+
+
+PAGE_ROWS = 10000
+# Directories of this depth or less are listed in the index.
+INDEX_DEPTH = 2
+
+PAGE_START = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>td{{white-space:pre;font-family:monospace;padding:0 1em 0 0}}
+.d{{background:lightsteelblue}}</style></head><body>
+<div>{nav}</div>
+<table>'''
+
+PAGE_END = '''</table>
+<div>{nav}</div>
+</body></html>'''
+
+FILE_ROW = '<tr><td>{name}<td>{size}<td>'
+DIR_ROW = '<tr class=d id=r{row}><td>{name}<td><td>{size}'
+INDEX_ROW = '<tr class=d><td>{name}<td><td>{size}'
+LINK = '<a href="{href}">{text}</a>'
+
+
+def pages_dir(file_path):
+    """Return directory of pages of index file_path."""
+    root, _ = os.path.splitext(str(file_path))
+    return root + '_pages'
+
+def page_name(number):
+    """Return file name of page number (from 1)."""
+    return '{:04d}.htm'.format(number)
+
+def page_nav(number, is_last, index_href):
+    """Return links to the index and neighbour pages of a page."""
+    links = [LINK.format(href=index_href, text='Index')]
+    if number > 1:
+        links.append(LINK.format(href=page_name(number - 1), text='Previous'))
+    links.append('Page {}'.format(number))
+    if not is_last:
+        links.append(LINK.format(href=page_name(number + 1), text='Next'))
+    return ' | '.join(links)
+
+def write_page(out_dir, number, rows, is_last, title, index_href):
+    """Write page number with rows to directory out_dir."""
+    nav = page_nav(number, is_last, index_href)
+    with open_output(os.path.join(out_dir, page_name(number))) as fhand:
+        write_lines([PAGE_START.format(title=title, nav=nav)], fhand)
+        write_lines(rows, fhand)
+        write_lines([PAGE_END.format(nav=nav)], fhand)
+
+def write_pages(dir_path, file_path, page_rows=PAGE_ROWS, subdirs=True,
+                include_dir=True, is_indent=True, types=ALL,
+                report=print_error, matcher=None, workers=1, index=None,
+                progress=None, reader=None, limits=None):
+    """Write listing of dir_path to pages of page_rows rows in directory
+    file_path without extension + '_pages' and the index to file_path.
+    Pages are written one by one while the tree is traversed.
+    See scan_directory() for the other arguments.
+    Return the number of pages.
+    """
+    dir_path_str = str(dir_path.resolve())
+    str_date = date.today().strftime('%d.%m.%Y')
+    out_dir = pages_dir(file_path)
+    rel_dir = os.path.basename(out_dir)
+    title = escape('Listing in ' + dir_path_str)
+    try:
+        if matcher is None:
+            matcher = Matcher(types)
+        if progress is not None:
+            progress = ScanProgress(progress)
+        scan_index = ScanIndex(index) if index else None
+        try:
+            tree = scan_tree(dir_path, subdirs, include_dir, matcher,
+                             workers, scan_index, progress, reader,
+                             limits)
+        finally:
+            if scan_index:
+                scan_index.close()
+        os.makedirs(out_dir, exist_ok=True)
+
+        # Pages: (first entry, number), index: (depth, name, total, href).
+        pages = []
+        index_rows = []
+        rows = []
+        row = 0
+        index_href = '../' + os.path.basename(str(file_path))
+        for node, depth in tree.iter_tree(subdirs):
+            if not node.matched: continue
+            if node.is_dir and not include_dir: continue
+            if len(rows) == page_rows:
+                write_page(out_dir, len(pages), rows, False, title,
+                           index_href)
+                rows = []
+            if not rows:
+                pages.append((node.name, len(pages) + 1))
+            name = escape(' ' * 5 * (depth-1) * is_indent + node.name)
+            if node.is_dir:
+                rows.append(DIR_ROW.format(row=row, name=name,
+                                           size=size2str(node.total)))
+                if depth <= INDEX_DEPTH:
+                    index_rows.append((depth, node.name, node.total,
+                        '{}/{}#r{}'.format(rel_dir, page_name(len(pages)),
+                                           row)))
+            else:
+                rows.append(FILE_ROW.format(name=name,
+                                            size=size2str(node.size)))
+            row += 1
+        if rows:
+            write_page(out_dir, len(pages), rows, True, title, index_href)
+
+        caption = ('Listing on {} for {} files in:\n{}\nSize of {} files: {}'
+                   '\n{:,} entries in {} pages').format(str_date, types,
+                    dir_path_str, types, size2str(tree.total[0]), row,
+                    len(pages))
+        if limits is not None and limits.truncated:
+            caption += '\n' + limits.truncated
+        with open_output(file_path) as fhand:
+            write_lines(index_page(title, caption, pages, index_rows,
+                                   rel_dir), fhand)
+        return len(pages)
+    except MemoryError as m_err:
+        tip = '\n\nTry a folder with less depth or less small files.'
+        report(m_err.__class__.__name__, str(m_err) + tip)
+    except Exception as e:
+        report(e.__class__.__name__, str(e))
+    return 0
+
+def index_page(title, caption, pages, index_rows, rel_dir):
+    """Yield lines of the index page."""
+    yield PAGE_START.format(title=title, nav='<pre>{}</pre>'.format(
+                                                        escape(caption)))
+    for depth, name, total, href in index_rows:
+        name = escape(' ' * 5 * (depth-1) + name)
+        yield INDEX_ROW.format(name=LINK.format(href=href, text=name),
+                               size=size2str(total))
+    yield '</table>\n<table>'
+    for name, number in pages:
+        href = '{}/{}'.format(rel_dir, page_name(number))
+        yield FILE_ROW.format(name=LINK.format(href=href,
+                              text='Page {}'.format(number)),
+                              size=escape(name))
+    yield PAGE_END.format(nav='')
@@ -0,0 +1,162 @@
+"""Summary of FileLister: the largest files and directories and the
+directories holding most of the bytes are found during one streaming
+walk. Only the top N of each are kept in heaps, so memory doesn't
+depend on the size of the tree and no listing is built.
+"""
+
+import heapq
+from datetime import date
+
+from .core import (ALL, HTM, HTML_DIR_COLOR, HTML_ROW, HTML_START, TXT,
+                   Matcher, ScanProgress, print_error, size2str, walk_sorted)
+
+
+TOP = 10
+# Part of bytes the directories of the summary must account for.
+COVERAGE = 0.9
+
+
+class TopSummary:
+    """Class keeps the N largest files, directories by total size and
+    directories by size of their own files (not in subdirectories)
+    in bounded min-heaps of (size, path).
+    Files and directories smaller than min_size are not kept.
+    """
+
+    def __init__(self, top=TOP, min_size=0):
+        """Set number of entries to keep and minimal size."""
+        self.top = top
+        self.min_size = min_size
+        self.files = []
+        self.dirs = []
+        self.own = []
+        # Count and bytes of matching files of at least min_size.
+        self.count = 0
+        self.bytes = 0
+        self.total = 0
+
+    def push(self, heap, size, path):
+        """Keep (size, path) in heap if it is one of top largest."""
+        if len(heap) < self.top:
+            heapq.heappush(heap, (size, path))
+        elif size > heap[0][0]:
+            heapq.heapreplace(heap, (size, path))
+
+    def add_file(self, path, size):
+        """Count a matching file."""
+        if size >= self.min_size:
+            self.count += 1
+            self.bytes += size
+            self.push(self.files, size, path)
+
+    def add_dir(self, path, total, own):
+        """Count a directory with total size and size of own files."""
+        if total >= self.min_size:
+            self.push(self.dirs, total, path)
+        if own:
+            self.push(self.own, own, path)
+
+    def largest(self, heap):
+        """Return list of (size, path) of heap, the largest first."""
+        return sorted(heap, key=lambda item: (-item[0], item[1]))
+
+    def covering(self, part=COVERAGE):
+        """Return list of (size, path, cumulative part of total) of the
+        directories with the largest own files which account for part
+        of the total size (or all directories kept).
+        """
+        result = []
+        covered = 0
+        for size, path in self.largest(self.own):
+            if covered >= part * self.total: break
+            covered += size
+            result.append((size, path, covered / self.total))
+        return result
+
+    def add_events(self, events):
+        """Count (node, depth, closing) events of walk_sorted()."""
+        parts = []
+        # Size of own files of the open directories by depth.
+        own = [0]
+        for node, depth, closing in events:
+            if not closing:
+                parts[depth-1:] = [node.name]
+                if node.is_dir:
+                    own[depth:] = [0]
+                elif node.matched:
+                    own[depth-1] += node.size
+                    self.add_file('/'.join(parts[:depth]), node.size)
+            elif depth:
+                self.add_dir('/'.join(parts[:depth]), node.total, own[depth])
+            else:
+                self.total = node.total
+                self.add_dir('.', node.total, own[0])
+
+
+def scan_summary(dir_path, subdirs=True, ext=TXT, types=ALL,
+                report=print_error, matcher=None, top=TOP, min_size=0,
+                progress=None, reader=None):
+    """Return strings of TXT or HTML summary of dir_path: its top
+    largest files and directories and directories which own files take
+    COVERAGE of the total size. Entries smaller than min_size are not
+    listed. The tree is walked by walk_sorted() and only the summary
+    is kept in memory.
+    progress(ScanProgress) is called while walking if it's given.
+    reader is DirReader with options of the filesystem.
+    Errors are passed to report(title, message).
+    """
+    is_html = ext == HTM
+
+    dir_path_str = str(dir_path.resolve())
+    str_date = date.today().strftime('%d.%m.%Y')
+    header = 'Summary on {} for {} files in:\n'.format(str_date, types)
+    stars = '*' * len(dir_path_str) + '\n'
+    try:
+        if matcher is None:
+            matcher = Matcher(types)
+        if progress is not None:
+            progress = ScanProgress(progress)
+        summary = TopSummary(top, min_size)
+        summary.add_events(walk_sorted(dir_path, subdirs, subdirs, matcher,
+                                       progress, reader))
+        size = 'Size of {} files: {}'.format(types, size2str(summary.total))
+        if min_size:
+            size += '\n{:,} files of at least {}: {}'.format(summary.count,
+                            size2str(min_size), size2str(summary.bytes))
+        caption = header + stars + dir_path_str + '\n' + stars + size
+        if is_html:
+            yield HTML_START.format('Summary of ' + dir_path_str, caption)
+        else:
+            yield caption
+
+        covering = summary.covering()
+        part = covering[-1][2] if covering else 0.0
+        sections = [
+            ('Largest {} files'.format(top), [(size, path, None)
+                for size, path in summary.largest(summary.files)]),
+            ('Largest {} directories'.format(top), [(size, path, None)
+                for size, path in summary.largest(summary.dirs)]),
+            ('Directories with {:.0%} of bytes in own files'.format(part),
+                covering),
+        ]
+        for title, rows in sections:
+            if is_html:
+                yield HTML_ROW.format(name=title, color=HTML_DIR_COLOR,
+                                      f_size='', d_size='')
+            else:
+                yield '\n{:{fill}<130}'.format(title, fill='-')
+            for row_size, path, covered in rows:
+                if covered is not None:
+                    path += ' ({:.1%})'.format(covered)
+                if is_html:
+                    yield HTML_ROW.format(name=path, color='',
+                                          f_size=size2str(row_size),
+                                          d_size='')
+                else:
+                    yield '{:{fill}<120}{}'.format(path, size2str(row_size),
+                                                   fill=' ')
+    except MemoryError as m_err:
+        tip = '\n\nTry a folder with less depth or less small files.'
+        report(m_err.__class__.__name__, str(m_err) + tip)
+    except Exception as e:
+        report(e.__class__.__name__, str(e))